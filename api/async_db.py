@@ -0,0 +1,37 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+# Extra database connections async views may hold at once for queries they
+# run alongside the request's own connection.
+ASYNC_DB_CONCURRENCY = getattr(settings, 'ASYNC_DB_CONCURRENCY', 4)
+
+_budget = None
+
+
+def _budget_semaphore():
+    global _budget
+    if _budget is None:
+        _budget = asyncio.Semaphore(ASYNC_DB_CONCURRENCY)
+    return _budget
+
+
+def _run_in_worker(func, *args):
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_query(func, *args):
+    """
+    Run a blocking ORM call on a worker thread with its own connection so it
+    overlaps with queries on the request's thread. At most
+    ASYNC_DB_CONCURRENCY such calls run at once; connections are closed
+    afterwards according to CONN_MAX_AGE.
+    """
+    async with _budget_semaphore():
+        return await sync_to_async(_run_in_worker, thread_sensitive=False)(func, *args)
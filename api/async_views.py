@@ -0,0 +1,339 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.urls import URLPattern
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import exceptions, status
+from rest_framework.serializers import ValidationError, as_serializer_error
+
+from . import counts, etags, hashing, listing, pagination, tag_cloud, tokens
+from .authentication import CachedJWTAuthentication
+from .renderers import FastJSONRenderer
+from .models import Article, Comment, Profile, User
+from .serializers import (
+    ArticleSerializer, CommentSerializer, CurrentUserSerializer, LoginSerializer, ProfileSerializer, RegistrationSerializer,
+    adata
+)
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json', headers=headers)
+
+
+def busy_response():
+    return json_response(
+        {'detail': 'Too many authentication requests in progress, please retry shortly.'},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': '1'}
+    )
+
+
+def read_user_payload(request):
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError as exc:
+        return None, json_response({'detail': f'JSON parse error - {exc}'}, status=status.HTTP_400_BAD_REQUEST)
+    return body.get('user', {}), None
+
+
+def user_payload(user):
+    user_data = CurrentUserSerializer(user).data
+    user_data['token'] = tokens.access_token_for(user)
+    return {'user': user_data}
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """
+    POST /api/users/login - LoginSerializer semantics with the password check
+    on the hashing pool.
+    """
+    data, error = read_user_payload(request)
+    if error:
+        return error
+
+    serializer = LoginSerializer(data=data)
+    try:
+        credentials = serializer.to_internal_value(data)
+    except ValidationError as exc:
+        return json_response(as_serializer_error(exc), status=status.HTTP_400_BAD_REQUEST)
+
+    user = await User.objects.select_related('profile').filter(email=credentials['email']).afirst()
+
+    try:
+        if user is None:
+            # Hash anyway so unknown emails take as long as wrong passwords.
+            await hashing.pool.run(make_password, credentials['password'])
+            valid = False
+        else:
+            valid, rehashed = await hashing.pool.run(hashing.verify_password, credentials['password'], user.password)
+            if valid and rehashed:
+                user.password = rehashed
+                await User.objects.filter(pk=user.pk).aupdate(password=rehashed)
+    except hashing.PoolSaturated:
+        return busy_response()
+
+    if not valid or not user.is_active:
+        error = ValidationError("Invalid email or password.")
+        return json_response(as_serializer_error(error), status=status.HTTP_400_BAD_REQUEST)
+
+    return json_response(await sync_to_async(user_payload)(user))
+
+
+@csrf_exempt
+@require_POST
+async def register(request):
+    """
+    POST /api/users/ - RegistrationSerializer semantics with the password hash
+    computed on the hashing pool.
+    """
+    data, error = read_user_payload(request)
+    if error:
+        return error
+
+    serializer = RegistrationSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    validated_data = serializer.validated_data
+    try:
+        password = await hashing.pool.run(make_password, validated_data['password'])
+    except hashing.PoolSaturated:
+        return busy_response()
+
+    user = await User.objects.acreate(
+        username=User.normalize_username(validated_data['username']),
+        email=User.objects.normalize_email(validated_data['email']),
+        password=password
+    )
+    await Profile.objects.acreate(user=user)
+
+    return json_response(await sync_to_async(user_payload)(user), status=status.HTTP_201_CREATED)
+
+
+def exception_response(request, exc):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = None
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        headers = {'WWW-Authenticate': CachedJWTAuthentication().authenticate_header(request)}
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+async def authenticate(request, required=True):
+    """
+    Resolve request.user from the JWT header. Session authentication is not
+    consulted on the async read paths.
+    """
+    result = await CachedJWTAuthentication().aauthenticate(request)
+    if result is None:
+        if required:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = AnonymousUser(), None
+    else:
+        request.user, request.auth = result
+    return request.user
+
+
+async def fetch(queryset, chunk_size):
+    return [row async for row in queryset.aiterator(chunk_size=max(chunk_size, 1))]
+
+
+def not_found(model):
+    return exceptions.NotFound(f'No {model._meta.object_name} matches the given query.')
+
+
+def api_view(view):
+    """
+    Turn DRF APIExceptions raised by an async view into DRF-shaped responses.
+    """
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return exception_response(request, exc)
+    return wrapper
+
+
+@api_view
+async def article_list(request, **kwargs):
+    """
+    GET /api/articles - async ArticleViewSet.list; the count and the page are
+    fetched concurrently.
+    """
+    user = await authenticate(request)
+    query = listing.ArticleListQuery(request.GET)
+    limit, offset, cursor = query.limit, query.offset, query.cursor
+
+    if query.index_only:
+        article_ids = await sync_to_async(query.match_tags)()
+        page_ids = article_ids[offset:offset+limit]
+        articles = await Article.objects.with_listing_data(user).ain_bulk(page_ids)
+        serializer = ArticleSerializer([articles[pk] for pk in page_ids if pk in articles], many=True, context={'request': request})
+        return json_response({
+            'articles': await adata(serializer),
+            'articlesCount': len(article_ids)
+        })
+
+    queryset = query.filter(Article.objects.with_listing_data(user))
+
+    if cursor is not None:
+        page = pagination.keyset_queryset(queryset, cursor)
+
+    count = counts.aarticles_count(queryset, **query.count_filters)
+
+    if cursor is not None:
+        if limit <= 0:
+            articles_count = await count
+            articles, next_cursor = [], cursor or None
+        else:
+            articles_count, rows = await asyncio.gather(count, fetch(page[:limit + 1], limit + 1))
+            articles, next_cursor = pagination.keyset_result(rows, limit)
+        serializer = ArticleSerializer(articles, many=True, context={'request': request})
+        return json_response({
+            'articles': await adata(serializer),
+            'articlesCount': articles_count,
+            'nextCursor': next_cursor
+        })
+
+    articles_count, articles = await asyncio.gather(count, fetch(queryset[offset:offset+limit], limit))
+    serializer = ArticleSerializer(articles, many=True, context={'request': request})
+    return json_response({
+        'articles': await adata(serializer),
+        'articlesCount': articles_count
+    })
+
+
+@api_view
+async def article_detail(request, slug=None, **kwargs):
+    """
+    GET /api/articles/:slug - async ArticleViewSet.retrieve.
+    """
+    user = await authenticate(request)
+    if request.headers.get('If-None-Match'):
+        state = await etags.state_queryset(user).filter(slug=slug).afirst()
+        if state is not None:
+            current_etag = etags.etag(state)
+            if etags.not_modified(request, current_etag):
+                return HttpResponse(
+                    status=status.HTTP_304_NOT_MODIFIED,
+                    headers={'ETag': current_etag, 'Cache-Control': etags.CACHE_CONTROL}
+                )
+
+    try:
+        article = await Article.objects.with_listing_data(user).aget(slug=slug)
+    except Article.DoesNotExist:
+        raise not_found(Article)
+
+    return json_response(
+        await adata(ArticleSerializer(article, context={'request': request})),
+        headers={'ETag': etags.etag(etags.state_of(article)), 'Cache-Control': etags.CACHE_CONTROL}
+    )
+
+
+@api_view
+async def article_comments(request, slug=None, **kwargs):
+    """
+    GET /api/articles/:slug/comments - async comments listing.
+    """
+    user = await authenticate(request)
+    article_id = await Article.objects.filter(slug=slug).values_list('pk', flat=True).afirst()
+    if article_id is None:
+        raise not_found(Article)
+
+    comments = Comment.objects.filter(article_id=article_id).with_author_data(user).order_by('-created_at', '-id')
+
+    cursor = request.GET.get('cursor')
+    limit = request.GET.get('limit')
+    if cursor is not None or limit is not None:
+        limit = min(int(limit or 20), pagination.COMMENTS_MAX_LIMIT)
+        comments = pagination.keyset_queryset(comments, cursor)
+        if limit <= 0:
+            comments, next_cursor = [], cursor or None
+        else:
+            comments, next_cursor = pagination.keyset_result(await fetch(comments[:limit + 1], limit + 1), limit)
+        serializer = CommentSerializer(comments, many=True, context={'request': request})
+        return json_response({'comments': serializer.data, 'nextCursor': next_cursor})
+
+    serializer = CommentSerializer(await fetch(comments, 100), many=True, context={'request': request})
+    return json_response({'comments': serializer.data})
+
+
+@api_view
+async def tag_list(request, **kwargs):
+    """
+    GET /api/tags - async TagViewSet.list.
+    """
+    await authenticate(request, required=False)
+    popular = request.GET.get('popular') in ('1', 'true')
+    limit = request.GET.get('limit')
+    limit = int(limit) if limit else None
+
+    current_version = await tag_cloud.aversion()
+    etag = tag_cloud.etag(current_version, popular, limit)
+    headers = {'ETag': etag, 'Cache-Control': 'public, max-age=0, must-revalidate'}
+    if etags.not_modified(request, etag):
+        return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cloud = await sync_to_async(tag_cloud.entries)(current_version)
+    return json_response(tag_cloud.payload(cloud, popular, limit), headers=headers)
+
+
+@api_view
+async def profile_detail(request, username=None, **kwargs):
+    """
+    GET /api/profiles/:username - async ProfileViewSet.retrieve.
+    """
+    user = await authenticate(request)
+    try:
+        profile = await Profile.objects.select_related('user').aget(user__username=username)
+    except Profile.DoesNotExist:
+        return json_response({'detail': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    profile.is_followed = await Profile.follows.through.objects.filter(
+        from_profile__user_id=user.id,
+        to_profile_id=profile.id
+    ).aexists()
+
+    return json_response({'profile': ProfileSerializer(profile, context={'request': request}).data})
+
+
+ASYNC_READ_VIEWS = {
+    'article-list': article_list,
+    'article-detail': article_detail,
+    'article-comment': article_comments,
+    'tag-list': tag_list,
+    'profile-detail': profile_detail,
+}
+
+
+def with_async_reads(patterns):
+    """
+    Serve GET on the hot read routes with the async views above; every other
+    method on those routes still goes to the DRF viewset.
+    """
+    routed = []
+    for pattern in patterns:
+        async_view = ASYNC_READ_VIEWS.get(pattern.name)
+        if async_view is not None:
+            pattern = URLPattern(pattern.pattern, get_or_sync(async_view, pattern.callback), pattern.default_args, pattern.name)
+        routed.append(pattern)
+    return routed
+
+
+def get_or_sync(async_view, sync_view):
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            return await async_view(request, *args, **kwargs)
+        return await dispatch(request, *args, **kwargs)
+
+    dispatch = sync_to_async(sync_view)
+    # Let the metrics label both halves with the viewset action.
+    view.cls, view.actions = sync_view.cls, sync_view.actions
+    return view
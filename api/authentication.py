@@ -0,0 +1,166 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+# Seconds a principal is kept in the per-process LRU and in the shared cache.
+AUTH_LOCAL_TTL = getattr(settings, 'AUTH_LOCAL_TTL', 5)
+AUTH_LOCAL_SIZE = getattr(settings, 'AUTH_LOCAL_SIZE', 1024)
+AUTH_SHARED_TTL = getattr(settings, 'AUTH_SHARED_TTL', 60)
+
+
+class PrincipalCache:
+    """
+    Two-tier cache of authenticated users with their profile preloaded.
+
+    Entries are stored pickled so every request gets its own instances and a
+    view mutating request.user cannot leak into other requests.
+    """
+
+    def __init__(self, ttl, size, shared_ttl):
+        self.ttl = ttl
+        self.size = size
+        self.shared_ttl = shared_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id):
+        return f'auth:principal:{user_id}'
+
+    def get(self, user_id):
+        key = self._key(user_id)
+        data = self._local(key)
+        if data is None:
+            data = cache.get(key)
+            if data is None:
+                return None
+            self._remember(key, data)
+        return pickle.loads(data)
+
+    async def aget(self, user_id):
+        key = self._key(user_id)
+        data = self._local(key)
+        if data is None:
+            data = await cache.aget(key)
+            if data is None:
+                return None
+            self._remember(key, data)
+        return pickle.loads(data)
+
+    def set(self, user_id, user):
+        key = self._key(user_id)
+        data = pickle.dumps(user)
+        cache.set(key, data, self.shared_ttl)
+        self._remember(key, data)
+
+    async def aset(self, user_id, user):
+        key = self._key(user_id)
+        data = pickle.dumps(user)
+        await cache.aset(key, data, self.shared_ttl)
+        self._remember(key, data)
+
+    def invalidate(self, user_id):
+        transaction.on_commit(lambda: self._drop(self._key(user_id)))
+
+    def _drop(self, key):
+        cache.delete(key)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _local(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        return None
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+principals = PrincipalCache(AUTH_LOCAL_TTL, AUTH_LOCAL_SIZE, AUTH_SHARED_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that verifies the token locally and resolves the user,
+    with its profile, from PrincipalCache before falling back to the database.
+    """
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+
+        user = principals.get(user_id)
+        if user is None:
+            try:
+                user = User.objects.select_related('profile').get(**{api_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            principals.set(user_id, user)
+
+        return self.check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+
+        user = await principals.aget(user_id)
+        if user is None:
+            try:
+                user = await User.objects.select_related('profile').aget(**{api_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            await principals.aset(user_id, user)
+
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,55 @@
+# Endpoint cases run by `manage.py bench_endpoints`, in order, once per
+# iteration. `queries` is the most SQL statements one call may run after the
+# warm-up iteration and `p95_ms` the 95th percentile latency allowed on the
+# seeded SQLite database; the run fails when either is exceeded.
+#
+# Paths and bodies are formatted with the run state: {n} is the iteration,
+# {slug}/{username}/{tag} are seeded rows the viewer has not favorited or
+# followed, {email}/{password} are the viewer's credentials and {created} is
+# the slug of the article made by the "create article" case.
+CASES = [
+    {'name': 'api root', 'route': 'api-root', 'method': 'get', 'path': '/api/', 'queries': 0, 'p95_ms': 25},
+    {
+        'name': 'register', 'route': 'user-register', 'method': 'post', 'path': '/api/users/',
+        'body': {'user': {'username': 'bench{n}', 'email': 'bench{n}@example.com', 'password': '{password}'}},
+        'auth': False, 'queries': 6, 'p95_ms': 50
+    },
+    {
+        'name': 'login', 'route': 'user-login', 'method': 'post', 'path': '/api/users/login',
+        'body': {'user': {'email': '{email}', 'password': '{password}'}},
+        'auth': False, 'queries': 2, 'p95_ms': 50
+    },
+    {'name': 'current user', 'route': 'user-current', 'method': 'get', 'path': '/api/user', 'queries': 0, 'p95_ms': 25},
+    {
+        'name': 'update user', 'route': 'user-current', 'method': 'put', 'path': '/api/user',
+        'body': {'user': {'bio': 'bench {n}'}}, 'queries': 4, 'p95_ms': 50
+    },
+    {'name': 'list articles', 'route': 'article-list', 'method': 'get', 'path': '/api/articles/?limit=20', 'queries': 4, 'p95_ms': 75},
+    {'name': 'list by tag', 'route': 'article-list', 'method': 'get', 'path': '/api/articles/?tag={tag}&limit=20', 'queries': 3, 'p95_ms': 75},
+    {'name': 'list by cursor', 'route': 'article-list', 'method': 'get', 'path': '/api/articles/?cursor=&limit=20', 'queries': 2, 'p95_ms': 75},
+    {
+        'name': 'create article', 'route': 'article-list', 'method': 'post', 'path': '/api/articles/',
+        'body': {'article': {'title': 'Bench {n}', 'description': 'bench', 'body': 'bench body', 'tagList': ['{tag}', 'bench']}},
+        'queries': 18, 'p95_ms': 75
+    },
+    {'name': 'feed', 'route': 'article-feed', 'method': 'get', 'path': '/api/articles/feed/', 'queries': 4, 'p95_ms': 75},
+    {'name': 'search', 'route': 'article-search', 'method': 'get', 'path': '/api/articles/search/?q=django', 'queries': 4, 'p95_ms': 75},
+    {'name': 'export', 'route': 'article-export', 'method': 'get', 'path': '/api/articles/export/', 'queries': 4, 'p95_ms': 250},
+    {'name': 'article', 'route': 'article-detail', 'method': 'get', 'path': '/api/articles/{slug}/', 'queries': 2, 'p95_ms': 50},
+    {
+        'name': 'update article', 'route': 'article-detail', 'method': 'put', 'path': '/api/articles/{created}/',
+        'body': {'article': {'body': 'bench body {n}'}}, 'queries': 7, 'p95_ms': 50
+    },
+    {'name': 'comments', 'route': 'article-comment', 'method': 'get', 'path': '/api/articles/{slug}/comments/', 'queries': 3, 'p95_ms': 75},
+    {
+        'name': 'add comment', 'route': 'article-comment', 'method': 'post', 'path': '/api/articles/{slug}/comments/',
+        'body': {'comment': {'body': 'bench comment {n}'}}, 'queries': 6, 'p95_ms': 50
+    },
+    {'name': 'favorite', 'route': 'article-toggle-favorite', 'method': 'post', 'path': '/api/articles/{slug}/favorite/', 'queries': 8, 'p95_ms': 50},
+    {'name': 'unfavorite', 'route': 'article-toggle-favorite', 'method': 'delete', 'path': '/api/articles/{slug}/favorite/', 'queries': 8, 'p95_ms': 50},
+    {'name': 'tags', 'route': 'tag-list', 'method': 'get', 'path': '/api/tags/', 'auth': False, 'queries': 1, 'p95_ms': 25},
+    {'name': 'profile', 'route': 'profile-detail', 'method': 'get', 'path': '/api/profiles/{username}/', 'queries': 2, 'p95_ms': 25},
+    {'name': 'follow', 'route': 'profile-toggle-follow', 'method': 'post', 'path': '/api/profiles/{username}/follow/', 'queries': 11, 'p95_ms': 50},
+    {'name': 'unfollow', 'route': 'profile-toggle-follow', 'method': 'delete', 'path': '/api/profiles/{username}/follow/', 'queries': 10, 'p95_ms': 50},
+    {'name': 'delete article', 'route': 'article-detail', 'method': 'delete', 'path': '/api/articles/{created}/', 'queries': 11, 'p95_ms': 75},
+]
@@ -0,0 +1,38 @@
+import time
+
+from django.core.cache import cache
+
+
+def _initial():
+    # Start from the clock so a cleared or evicted version never returns to a
+    # value whose entries are still cached.
+    return int(time.time() * 1000)
+
+
+class CacheVersion:
+    """
+    A version number kept in the shared cache under `key`. Entries cached
+    under keys that include it are all retired at once by bump().
+    """
+
+    def __init__(self, key):
+        self.key = key
+
+    def get(self):
+        cache.add(self.key, _initial(), None)
+        return cache.get(self.key)
+
+    async def aget(self):
+        await cache.aadd(self.key, _initial(), None)
+        return await cache.aget(self.key)
+
+    def bump(self):
+        """
+        Move to a new version and return it, or None when the version had
+        been evicted and was started again.
+        """
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            cache.set(self.key, _initial(), None)
+            return None
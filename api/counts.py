@@ -0,0 +1,108 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, router, transaction
+
+from . import async_db
+from .cache_versions import CacheVersion
+
+ARTICLES_COUNT_TIMEOUT = getattr(settings, 'ARTICLES_COUNT_TIMEOUT', 300)
+
+# When set, the unfiltered article count is taken from table statistics once
+# they report more rows than this, instead of running COUNT(*).
+ARTICLES_COUNT_ESTIMATE_THRESHOLD = getattr(settings, 'ARTICLES_COUNT_ESTIMATE_THRESHOLD', None)
+
+version = CacheVersion('articles_count:version')
+
+
+def _digest(filters):
+    normalized = '&'.join(f'{name}={value}' for name, value in sorted(filters.items()) if value)
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def _cache_key(filters):
+    return f'articles_count:{version.get()}:{_digest(filters)}'
+
+
+def primary(queryset):
+    """
+    The queryset on the primary. Cached values are filled from it, so a replica
+    lagging behind the write that moved the version cannot be cached under it.
+    """
+    return queryset.using(router.db_for_write(queryset.model))
+
+
+def invalidate():
+    """
+    Retire every cached count by moving to a new cache key version once the
+    current transaction commits.
+    """
+    transaction.on_commit(version.bump)
+
+
+def estimated_count(model):
+    """
+    Return the row count reported by the database statistics, or None when the
+    backend does not keep one.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [table]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def articles_count(queryset, **filters):
+    """
+    Return the article count for a filter combination, served from the cache
+    when possible. Unfiltered counts above ARTICLES_COUNT_ESTIMATE_THRESHOLD
+    come from table statistics.
+    """
+    key = _cache_key(filters)
+    count = cache.get(key)
+    if count is not None:
+        return count
+
+    count = None
+    if ARTICLES_COUNT_ESTIMATE_THRESHOLD is not None and not any(filters.values()):
+        estimate = estimated_count(queryset.model)
+        if estimate is not None and estimate > ARTICLES_COUNT_ESTIMATE_THRESHOLD:
+            count = estimate
+
+    if count is None:
+        count = primary(queryset).count()
+
+    cache.set(key, count, ARTICLES_COUNT_TIMEOUT)
+    return count
+
+
+async def aarticles_count(queryset, **filters):
+    """
+    Async articles_count(); a cache miss is counted on its own connection
+    through async_db so it can overlap with the page query.
+    """
+    key = f'articles_count:{await version.aget()}:{_digest(filters)}'
+    count = await cache.aget(key)
+    if count is not None:
+        return count
+
+    count = None
+    if ARTICLES_COUNT_ESTIMATE_THRESHOLD is not None and not any(filters.values()):
+        estimate = await async_db.run_query(estimated_count, queryset.model)
+        if estimate is not None and estimate > ARTICLES_COUNT_ESTIMATE_THRESHOLD:
+            count = estimate
+
+    if count is None:
+        count = await async_db.run_query(primary(queryset).count)
+
+    await cache.aset(key, count, ARTICLES_COUNT_TIMEOUT)
+    return count
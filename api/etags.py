@@ -0,0 +1,66 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+
+from .models import Article
+
+# Responses depend on the viewer, so shared caches must not reuse them.
+CACHE_CONTROL = 'private, max-age=0, must-revalidate'
+
+# Everything an article response depends on that can change, in the order it
+# is hashed: tags are left out because every tag change made through the API
+# also bumps updated_at.
+STATE_FIELDS = (
+    'pk', 'updated_at', 'favorites_count', 'comments_count', 'is_favorited', 'author_followed',
+    'author__username', 'author__profile__bio', 'author__profile__image'
+)
+
+
+def state_queryset(user):
+    """
+    Article rows reduced to STATE_FIELDS for the viewer; filtered by slug this
+    is one lookup on the unique slug index joined by primary key.
+    """
+    return Article.objects.with_viewer_state(user).values_list(*STATE_FIELDS)
+
+
+def state_of(article):
+    profile = getattr(article.author, 'profile', None)
+    return (
+        article.pk, article.updated_at, article.favorites_count, article.comments_count,
+        getattr(article, 'is_favorited', False), getattr(article, 'author_followed', False),
+        article.author.username, profile and profile.bio, profile and profile.image
+    )
+
+
+def etag(state):
+    """
+    Strong ETag for one viewer's rendering of an article.
+    """
+    pk, updated_at, favorites_count, comments_count, favorited, following, *author = state
+    normalized = (pk, updated_at.isoformat(), favorites_count, comments_count, bool(favorited), bool(following), *author)
+    digest = hashlib.md5(repr(normalized).encode(), usedforsecurity=False).hexdigest()
+    return quote_etag(f'article-{state[0]}-{digest}')
+
+
+def not_modified(request, current_etag):
+    """
+    True when If-None-Match lists the current ETag (weak comparison).
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = [value.removeprefix('W/') for value in parse_etags(header)]
+    return '*' in etags or current_etag in etags
+
+
+def precondition_failed(request, current_etag):
+    """
+    True when If-Match is sent and does not list the current ETag (strong
+    comparison, so weak validators never match).
+    """
+    header = request.headers.get('If-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' not in etags and current_etag not in etags
@@ -0,0 +1,41 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import pagination, projection
+from .renderers import FastJSONRenderer
+
+# Articles read per query when streaming an export.
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 500)
+
+
+def article_lines(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield every article in the queryset as NDJSON, newest first, one block of
+    lines per batch.
+
+    Batches are keyset pages of `chunk_size` rows rendered through the
+    projection, so memory stays flat however many articles there are; unlike
+    QuerySet.iterator(), this also holds on MySQL, whose driver buffers the
+    full result of a single query.
+    """
+    renderer = FastJSONRenderer()
+    cursor = None
+    while True:
+        rows, cursor = pagination.keyset_page(queryset, cursor, chunk_size, load=projection.article_rows)
+        if rows:
+            yield b''.join(renderer.render(article) + b'\n' for article in projection.render_articles(rows))
+        if cursor is None:
+            return
+
+
+async def aiterate(iterator):
+    """
+    Drive a synchronous (database-backed) iterator from a thread so an ASGI
+    server can stream it instead of collecting it first.
+    """
+    next_block = sync_to_async(next)
+    while True:
+        block = await next_block(iterator, None)
+        if block is None:
+            return
+        yield block
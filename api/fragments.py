@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Article
+
+# Seconds a rendered article fragment is kept in the cache.
+ARTICLE_FRAGMENT_TIMEOUT = getattr(settings, 'ARTICLE_FRAGMENT_TIMEOUT', 3600)
+
+
+def key(article_id, updated_at):
+    return f'article:fragment:{article_id}:{updated_at.isoformat()}'
+
+
+def get_many(articles):
+    """
+    Return {article id: cached fragment} for the articles that have one.
+    """
+    keys = {key(article.pk, article.updated_at): article.pk for article in articles}
+    if not keys:
+        return {}
+    return {keys[cache_key]: fragment for cache_key, fragment in cache.get_many(list(keys)).items()}
+
+
+async def aget_many(articles):
+    keys = {key(article.pk, article.updated_at): article.pk for article in articles}
+    if not keys:
+        return {}
+    return {keys[cache_key]: fragment for cache_key, fragment in (await cache.aget_many(list(keys))).items()}
+
+
+def set_many(rendered):
+    """
+    Store fragments given as (article, fragment) pairs.
+    """
+    if rendered:
+        cache.set_many(
+            {key(article.pk, article.updated_at): fragment for article, fragment in rendered},
+            ARTICLE_FRAGMENT_TIMEOUT
+        )
+
+
+async def aset_many(rendered):
+    if rendered:
+        await cache.aset_many(
+            {key(article.pk, article.updated_at): fragment for article, fragment in rendered},
+            ARTICLE_FRAGMENT_TIMEOUT
+        )
+
+
+def invalidate(articles):
+    """
+    Drop the fragments of the articles, given as (id, updated_at) pairs, once
+    the current transaction commits.
+    """
+    keys = [key(article_id, updated_at) for article_id, updated_at in articles]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_ids(article_ids):
+    invalidate(Article.objects.filter(pk__in=list(article_ids)).values_list('pk', 'updated_at'))
+
+
+def invalidate_author(user_id):
+    invalidate(Article.objects.filter(author_id=user_id).values_list('pk', 'updated_at'))
+
+
+def invalidate_tag(tag):
+    invalidate(Article.objects.filter(tags=tag).values_list('pk', 'updated_at'))
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+PASSWORD_HASHING_WORKERS = getattr(settings, 'PASSWORD_HASHING_WORKERS', 4)
+PASSWORD_HASHING_MAX_PENDING = getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', 32)
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    Bounded thread pool for password hashing.
+
+    hashlib releases the GIL while deriving keys, so threads give real
+    parallelism without the cost of shipping work to other processes. Once
+    `max_pending` jobs are running or queued, `run()` raises PoolSaturated
+    straight away instead of queueing more.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PoolSaturated()
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+pool = HashingPool(PASSWORD_HASHING_WORKERS, PASSWORD_HASHING_MAX_PENDING)
+
+
+def verify_password(password, encoded):
+    """
+    Return (valid, rehashed) where `rehashed` is a new hash when `encoded` was
+    made with outdated hasher parameters, otherwise None.
+    """
+    rehashed = []
+    valid = check_password(password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return valid, rehashed[0] if rehashed else None
@@ -0,0 +1,139 @@
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.serializers import BaseSerializer
+
+# Statements reported as the slowest of a request.
+QUERY_LOG_SLOWEST = getattr(settings, 'QUERY_LOG_SLOWEST', 3)
+
+# Identical queries issued from one serializer method within a request before
+# they are reported as an N+1.
+QUERY_N_PLUS_ONE_THRESHOLD = getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 3)
+
+PLACEHOLDER_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+# Transaction control, which repeats by nature and is not a query to batch.
+TRANSACTION_CONTROL_RE = re.compile(r'\s*(?:BEGIN|SAVEPOINT|RELEASE|COMMIT|ROLLBACK)\b', re.IGNORECASE)
+
+current = ContextVar('request_record', default=None)
+
+
+def fingerprint(sql):
+    """
+    SQL with IN (...) lists of any length collapsed; parameters are passed
+    separately, so equal fingerprints mean the same statement shape.
+    """
+    return PLACEHOLDER_LIST_RE.sub('(...)', sql)
+
+
+def is_transaction_control(sql):
+    return TRANSACTION_CONTROL_RE.match(sql) is not None
+
+
+def serializer_origin():
+    """
+    Return 'Serializer.method' for the innermost serializer frame on the stack.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        owner = frame.f_locals.get('self')
+        if isinstance(owner, BaseSerializer):
+            return f'{type(owner).__name__}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class RequestRecord:
+    """
+    Queries and phase timings collected for one request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.timings = Counter()
+        self._active = set()
+        self._seen = set()
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration, _ in self.queries)
+
+    def slowest(self, count=QUERY_LOG_SLOWEST):
+        return sorted(self.queries, key=lambda query: query[1], reverse=True)[:count]
+
+    def duplicates(self):
+        repeated = Counter(sql for sql, _, _ in self.queries if not is_transaction_control(sql))
+        return {sql: count for sql, count in repeated.items() if count > 1}
+
+    def n_plus_one(self, threshold=QUERY_N_PLUS_ONE_THRESHOLD):
+        """
+        Return {(serializer method, fingerprint): count} for statements that
+        one serializer method ran at least `threshold` times.
+
+        Only repeats carry an origin, so the first run of each statement is
+        counted for the method that repeated it.
+        """
+        repeated = Counter((origin, sql) for sql, _, origin in self.queries if origin)
+        return {key: count + 1 for key, count in repeated.items() if count + 1 >= threshold}
+
+    def origin_of(self, sql):
+        """
+        Serializer method running `sql`, looked up only when the statement has
+        already run in this request; walking the stack for every query costs
+        more than the query log is worth.
+        """
+        if sql not in self._seen:
+            self._seen.add(sql)
+            return None
+        if is_transaction_control(sql):
+            return None
+        return serializer_origin()
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection; it only records while a
+    request is being instrumented.
+    """
+    record = current.get()
+    if record is None:
+        return execute(sql, params, many, context)
+
+    statement = fingerprint(sql)
+    origin = record.origin_of(statement)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record.queries.append((statement, time.perf_counter() - started, origin))
+
+
+def install(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to `phase` of the current request. Nested
+    blocks of the same phase are only counted once.
+    """
+    record = current.get()
+    if record is None or phase in record._active:
+        yield
+        return
+
+    record._active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.timings[phase] += time.perf_counter() - started
+        record._active.discard(phase)
@@ -0,0 +1,63 @@
+from django.db.models import Exists, OuterRef
+
+from .models import Article
+from .tag_index import index as tag_index
+
+
+class ArticleListQuery:
+    """
+    The filters, tag match and paging of GET /api/articles, parsed once from
+    the query parameters and applied the same way by ArticleViewSet.list and
+    the async article_list view.
+    """
+
+    def __init__(self, params):
+        self.author = params.get('author')
+        self.tag = params.get('tag')
+        self.favorited = params.get('favorited')
+        self.limit = int(params.get('limit', 20))
+        self.offset = int(params.get('offset', 0))
+        self.cursor = params.get('cursor')
+        self.tags = sorted({name for name in params.get('tags', '').split(',') if name})
+        self.tags_match = 'any' if params.get('tagsMatch') == 'any' else 'all'
+
+    @property
+    def index_only(self):
+        """
+        True when ?tags= is the only filter and offset paging is used, so the
+        page is sliced straight from the posting list.
+        """
+        return bool(self.tags) and not (self.author or self.tag or self.favorited) and self.cursor is None
+
+    @property
+    def count_filters(self):
+        return {
+            'author': self.author, 'tag': self.tag, 'favorited': self.favorited,
+            'tags': ','.join(self.tags), 'tags_match': self.tags and self.tags_match,
+        }
+
+    def match_tags(self):
+        return tag_index.match(self.tags, match_all=self.tags_match == 'all')
+
+    def filter(self, queryset):
+        """
+        Apply the author, tag, favorited and ?tags= filters.
+
+        ?tags= is matched with EXISTS subqueries on the through table here, so
+        the database combines it with the other filters instead of being sent
+        the whole posting list.
+        """
+        if self.author:
+            queryset = queryset.filter(author__username=self.author)
+        if self.tag:
+            queryset = queryset.filter(tags__name=self.tag)
+        if self.favorited:
+            queryset = queryset.filter(favorited_by__username=self.favorited)
+        if self.tags:
+            links = Article.tags.through.objects.filter(article_id=OuterRef('pk'))
+            if self.tags_match == 'all':
+                for name in self.tags:
+                    queryset = queryset.filter(Exists(links.filter(tag__name=name)))
+            else:
+                queryset = queryset.filter(Exists(links.filter(tag__name__in=self.tags)))
+        return queryset
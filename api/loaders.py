@@ -0,0 +1,64 @@
+from .models import Profile
+
+
+class ProfileLoader:
+    """
+    Resolves author profiles and the viewer's follow state for one request.
+
+    Serializers register the user ids they are about to render with `prime()`;
+    the first lookup then loads every pending profile with one IN query and
+    their follow state with a second one. Results are kept for the rest of the
+    request.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._profiles = {}
+        self._following = {}
+        self._pending = set()
+
+    @classmethod
+    def for_request(cls, request):
+        loader = getattr(request, '_profile_loader', None)
+        if loader is None:
+            loader = cls(request.user)
+            request._profile_loader = loader
+        return loader
+
+    def prime(self, user_ids):
+        self._pending.update(user_id for user_id in user_ids if user_id not in self._profiles)
+
+    def profile_for(self, user_id):
+        if user_id not in self._profiles:
+            self._pending.add(user_id)
+            self._load_profiles()
+        return self._profiles[user_id]
+
+    def is_following(self, profile):
+        if profile.id not in self._following:
+            self._load_following([profile.id])
+        return self._following[profile.id]
+
+    def _load_profiles(self):
+        user_ids = self._pending
+        self._pending = set()
+
+        profiles = Profile.objects.select_related('user').filter(user_id__in=user_ids)
+        self._profiles.update(dict.fromkeys(user_ids))
+        self._profiles.update((profile.user_id, profile) for profile in profiles)
+        self._load_following([profile.id for profile in self._profiles.values() if profile is not None])
+
+    def _load_following(self, profile_ids):
+        profile_ids = [profile_id for profile_id in profile_ids if profile_id not in self._following]
+        if not profile_ids:
+            return
+
+        followed = set()
+        if self.user is not None and self.user.is_authenticated:
+            followed = set(
+                Profile.follows.through.objects.filter(
+                    from_profile__user_id=self.user.id,
+                    to_profile_id__in=profile_ids
+                ).values_list('to_profile_id', flat=True)
+            )
+        self._following.update((profile_id, profile_id in followed) for profile_id in profile_ids)
@@ -0,0 +1,140 @@
+import io
+import json
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import get_resolver
+
+from api.benchmarks import CASES
+from api.models import Article, User
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+def fill(value, state):
+    if isinstance(value, str):
+        return value.format(**state)
+    if isinstance(value, dict):
+        return {key: fill(item, state) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill(item, state) for item in value]
+    return value
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway test database, call every API route and check latency and query-count budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--articles', type=int, default=500)
+        parser.add_argument('--no-budgets', action='store_true', help='Report without failing on exceeded budgets')
+
+    def handle(self, *args, **options):
+        api_routes = {name for name in route_names(get_resolver('api.urls').url_patterns)}
+        missing = api_routes - {case['route'] for case in CASES}
+        if missing:
+            raise CommandError(f"No benchmark case for route(s): {', '.join(sorted(missing))}")
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results, enforce=not options['no_budgets'])
+
+    def run(self, options):
+        cache.clear()
+        password = 'bench-password'
+        call_command(
+            'seed_data', users=options['users'], articles=options['articles'], seed=options['seed'],
+            password=password, stdout=io.StringIO()
+        )
+
+        viewer = User.objects.select_related('profile').order_by('pk').first()
+        followed = viewer.profile.follows.values('user_id')
+        other = User.objects.exclude(pk=viewer.pk).exclude(pk__in=followed).order_by('pk').first()
+        article = Article.objects.filter(author=other, comments__isnull=False).exclude(favorited_by=viewer).first()
+        state = {
+            'email': viewer.email, 'password': password, 'username': other.username,
+            'slug': article.slug, 'tag': article.tags.order_by('name').first().name, 'created': ''
+        }
+
+        client = Client()
+        response = client.post(
+            '/api/users/login', json.dumps({'user': {'email': viewer.email, 'password': password}}),
+            content_type='application/json'
+        )
+        token = response.json()['user']['token']
+
+        results = {case['name']: {'times': [], 'queries': []} for case in CASES}
+        for iteration in range(options['iterations'] + 1):
+            state['n'] = iteration
+            for case in CASES:
+                headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if case.get('auth', True) else {}
+                call = getattr(client, case['method'])
+                args = [fill(case['path'], state)]
+                if 'body' in case:
+                    args += [json.dumps(fill(case['body'], state)), 'application/json']
+
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = call(*args, **headers)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    elapsed = (time.perf_counter() - started) * 1000
+
+                if response.status_code >= 400:
+                    raise CommandError(f"{case['name']}: {case['method'].upper()} {args[0]} returned {response.status_code}")
+                if case['name'] == 'create article':
+                    state['created'] = response.json()['article']['slug']
+
+                # The first iteration warms caches and is not measured.
+                if iteration:
+                    results[case['name']]['times'].append(elapsed)
+                    results[case['name']]['queries'].append(len(queries.captured_queries))
+        return results
+
+    def report(self, results, enforce):
+        failures = []
+        self.stdout.write(f"{'case':16} {'p50 ms':>8} {'p95 ms':>8} {'budget':>8} {'queries':>8} {'budget':>7}")
+        for case in CASES:
+            result = results[case['name']]
+            p50, p95 = statistics.median(result['times']), percentile(result['times'], 0.95)
+            queries = max(result['queries'])
+            line = f"{case['name']:16} {p50:8.1f} {p95:8.1f} {case['p95_ms']:8} {queries:8} {case['queries']:7}"
+
+            over = []
+            if p95 > case['p95_ms']:
+                over.append(f"p95 {p95:.1f} ms > {case['p95_ms']} ms")
+            if queries > case['queries']:
+                over.append(f"{queries} queries > {case['queries']}")
+            if over:
+                failures.append(f"{case['name']}: {', '.join(over)}")
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        if failures and enforce:
+            raise CommandError('Budgets exceeded:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget') if not failures else 'Budgets exceeded (not enforced)')
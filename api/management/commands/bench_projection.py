@@ -0,0 +1,57 @@
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import projection
+from api.models import Article, Comment, User
+from api.serializers import ArticleSerializer, CommentSerializer
+
+
+class ViewerRequest:
+    def __init__(self, user):
+        self.user = user
+
+
+class Command(BaseCommand):
+    help = 'Compare the per-row CPU cost of the .values() projection and the serializers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Articles and comments rendered per pass')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--username', help='Viewer; defaults to the first user')
+
+    def handle(self, *args, **options):
+        rows, iterations = options['rows'], options['iterations']
+        if options['username']:
+            user = User.objects.get(username=options['username'])
+        else:
+            user = User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError('No users to view the articles as')
+        context = {'request': ViewerRequest(user)}
+
+        articles = Article.objects.with_listing_data(user).order_by('-created_at', '-id')[:rows]
+        article_id = Comment.objects.order_by().values_list('article_id', flat=True).first()
+        comments = Comment.objects.filter(article_id=article_id).with_author_data(user).order_by('-created_at', '-id')[:rows]
+
+        cases = [
+            (
+                'articles', list(articles), projection.article_rows(articles),
+                lambda items: ArticleSerializer(items, many=True, context=context).data,
+                projection.render_articles
+            ),
+            (
+                'comments', list(comments), projection.comment_rows(comments),
+                lambda items: CommentSerializer(items, many=True, context=context).data,
+                projection.render_comments
+            ),
+        ]
+
+        for name, instances, values, serialize, project in cases:
+            if not instances:
+                self.stdout.write(f'{name}: nothing to time')
+                continue
+
+            for label, func, items in (('serializer', serialize, instances), ('projection', project, values)):
+                seconds = timeit.timeit(lambda: func(items), number=iterations)
+                self.stdout.write(f'{name:10} {label:12} {seconds / iterations / len(items) * 1e6:8.1f} us/row')
@@ -0,0 +1,41 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api import tokens
+from api.models import User
+
+
+class PresentedRequest:
+    def __init__(self, auth):
+        self.auth = auth
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of issuing a token for GET /api/user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        user = User.objects.order_by('pk').first() or User(pk=1, username='bench', email='bench@example.com')
+
+        def mint():
+            refresh = RefreshToken.for_user(user)
+            return str(refresh.access_token)
+
+        presented = AccessToken(str(AccessToken.for_user(user)))
+        request = PresentedRequest(presented)
+
+        tokens.access_token_for(user)
+        cases = [
+            ('RefreshToken.for_user + access_token', mint),
+            ('access_token_for (presented token)', lambda: tokens.access_token_for(user, request)),
+            ('access_token_for (cached token)', lambda: tokens.access_token_for(user)),
+        ]
+
+        for name, func in cases:
+            seconds = timeit.timeit(func, number=iterations)
+            self.stdout.write(f'{name:40} {seconds / iterations * 1e6:10.1f} us/request')
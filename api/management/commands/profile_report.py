@@ -0,0 +1,42 @@
+import fnmatch
+import pstats
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import profiling
+
+SORT_KEYS = {'tottime': 2, 'cumtime': 3, 'calls': 1}
+
+
+class Command(BaseCommand):
+    help = 'Aggregate the per-request .prof files in PROFILING_DIR into a hot-function report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=profiling.PROFILING_DIR, help='Directory holding the .prof files')
+        parser.add_argument('--match', default='*', help='Only read files whose name matches this glob, e.g. "*GET-api-articles*"')
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='tottime')
+        parser.add_argument('--limit', type=int, default=25)
+
+    def handle(self, *args, **options):
+        if not options['dir']:
+            raise CommandError('Set PROFILING_DIR or pass --dir')
+        files = sorted(
+            path for path in Path(options['dir']).glob('*.prof')
+            if fnmatch.fnmatch(path.name, options['match'])
+        )
+        if not files:
+            raise CommandError(f"No .prof files in {options['dir']} match {options['match']!r}")
+
+        stats = pstats.Stats(*map(str, files))
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][SORT_KEYS[options['sort']]], reverse=True)
+
+        requests = len(files)
+        self.stdout.write(f'{requests} profiled request(s), {stats.total_tt * 1000:.1f} ms in total')
+        self.stdout.write(f"{'calls':>9} {'tottime ms':>11} {'cumtime ms':>11} {'cum/request':>11}  function")
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:options['limit']]:
+            where = name if filename == '~' else f'{filename}:{line}({name})'
+            self.stdout.write(
+                f'{calls:9} {tottime * 1000:11.2f} {cumtime * 1000:11.2f} '
+                f'{cumtime * 1000 / requests:11.2f}  {where}'
+            )
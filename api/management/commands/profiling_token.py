@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import profiling
+
+
+class Command(BaseCommand):
+    help = 'Print a signed X-Profile header value that asks for the request to be profiled'
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiling.make_token())
+        self.stderr.write(f'Valid for {profiling.PROFILING_TOKEN_MAX_AGE} seconds')
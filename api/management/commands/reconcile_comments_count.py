@@ -0,0 +1,8 @@
+from api.management.reconcile import ReconcileCountCommand
+
+
+class Command(ReconcileCountCommand):
+    help = 'Repair Article.comments_count where it drifted from the comments table'
+
+    counter_field = 'comments_count'
+    related_name = 'comments'
@@ -0,0 +1,8 @@
+from api.management.reconcile import ReconcileCountCommand
+
+
+class Command(ReconcileCountCommand):
+    help = 'Repair Article.favorites_count where it drifted from the favorites table'
+
+    counter_field = 'favorites_count'
+    related_name = 'favorited_by'
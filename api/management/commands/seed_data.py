@@ -0,0 +1,106 @@
+import io
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import counts, tag_cloud, timeline
+from api.models import Article, Comment, Profile, Tag, User
+from api.tag_index import index as tag_index
+
+WORDS = (
+    'django rest api cache query index async feed token article comment profile '
+    'tag search timeline latency budget python mysql sqlite render json stream'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a reproducible set of users, articles, tags, follows, favorites and comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--articles', type=int, default=500)
+        parser.add_argument('--tags', type=int, default=30)
+        parser.add_argument('--tags-per-article', type=int, default=3)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument('--favorites-per-user', type=int, default=10)
+        parser.add_argument('--comments-per-article', type=int, default=5)
+        parser.add_argument('--password', default='password123', help='Password of every seeded user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = f"seed{options['seed']}"
+
+        def text(words):
+            return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+        with transaction.atomic():
+            password = make_password(options['password'])
+            User.objects.bulk_create([
+                User(username=f'{prefix}_user{i}', email=f'{prefix}_user{i}@example.com', password=password)
+                for i in range(options['users'])
+            ])
+            users = list(User.objects.filter(username__startswith=f'{prefix}_user').order_by('pk'))
+            Profile.objects.bulk_create([Profile(user=user, bio=text(8)) for user in users])
+            profiles = {profile.user_id: profile for profile in Profile.objects.filter(user__in=users)}
+
+            Tag.objects.bulk_create(
+                [Tag(name=f'{prefix}-{rng.choice(WORDS)}-{i}') for i in range(options['tags'])],
+                ignore_conflicts=True
+            )
+            tags = list(Tag.objects.filter(name__startswith=f'{prefix}-').order_by('pk'))
+
+            Article.objects.bulk_create([
+                Article(
+                    title=f'{text(4).title()} {i}', slug=f'{prefix}-article-{i}',
+                    description=text(12), body=text(120), author=rng.choice(users)
+                )
+                for i in range(options['articles'])
+            ])
+            articles = list(Article.objects.filter(slug__startswith=f'{prefix}-article-').order_by('pk'))
+
+            if tags:
+                Article.tags.through.objects.bulk_create([
+                    Article.tags.through(article=article, tag=tag)
+                    for article in articles
+                    for tag in rng.sample(tags, min(options['tags_per_article'], len(tags)))
+                ])
+
+            follows = []
+            for user in users:
+                others = [other for other in users if other.pk != user.pk]
+                for author in rng.sample(others, min(options['follows_per_user'], len(others))):
+                    follows.append((user, author))
+            Profile.follows.through.objects.bulk_create([
+                Profile.follows.through(from_profile=profiles[user.pk], to_profile=profiles[author.pk])
+                for user, author in follows
+            ])
+            for user, author in follows:
+                timeline.backfill(user, author)
+
+            Article.favorited_by.through.objects.bulk_create([
+                Article.favorited_by.through(article=article, user=user)
+                for user in users
+                for article in rng.sample(articles, min(options['favorites_per_user'], len(articles)))
+            ])
+
+            Comment.objects.bulk_create([
+                Comment(article=article, author=rng.choice(users), body=text(20))
+                for article in articles
+                for _ in range(options['comments_per_article'])
+            ])
+
+        # bulk_create skips the signals and model methods that keep these in step.
+        for command in ('reconcile_favorites_count', 'reconcile_comments_count', 'rebuild_search_index'):
+            call_command(command, stdout=io.StringIO())
+        counts.invalidate()
+        tag_cloud.invalidate()
+        tag_index.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users, {len(tags)} tags, {len(articles)} articles, {len(follows)} follows '
+            f"and {len(articles) * options['comments_per_article']} comments (seed {options['seed']})"
+        ))
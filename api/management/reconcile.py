@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Article
+
+
+class ReconcileCountCommand(BaseCommand):
+    """
+    Base for commands that repair a denormalized counter on Article.
+    Subclasses set `counter_field` and `related_name`, the relation whose
+    rows the counter tracks.
+    """
+
+    counter_field = None
+    related_name = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted articles without fixing them')
+
+    def handle(self, *args, **options):
+        counts = (
+            Article.objects.filter(pk=OuterRef('pk'))
+            .order_by().values('pk').annotate(total=Count(self.related_name)).values('total')
+        )
+        drifted = (
+            Article.objects.order_by()
+            .annotate(actual=Coalesce(Subquery(counts, output_field=IntegerField()), 0))
+            .exclude(**{self.counter_field: F('actual')})
+            .values_list('id', self.counter_field, 'actual')
+        )
+
+        repaired = 0
+        for article_id, stored, actual in drifted.iterator():
+            self.stdout.write(f'Article {article_id}: {self.counter_field} {stored} -> {actual}')
+            if not options['dry_run']:
+                Article.objects.filter(pk=article_id).update(**{self.counter_field: actual})
+            repaired += 1
+
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {repaired} drifted article(s)'))
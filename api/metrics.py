@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+
+# Directory every worker process writes its metrics to so /metrics can add
+# them up; unset keeps metrics per process. Clear it when deploying.
+METRICS_DIR = getattr(settings, 'METRICS_DIR', None)
+
+# Seconds between a worker's writes to METRICS_DIR.
+METRICS_FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'api_requests_total': ('counter', 'Requests handled, by view, method and status code.'),
+    'api_request_duration_seconds': ('histogram', 'Time to produce the response, by view and method.'),
+}
+HISTOGRAM_BUCKETS = {'api_request_duration_seconds': LATENCY_BUCKETS}
+
+
+class Registry:
+    """
+    Counters and fixed-bucket histograms of one process, keyed on the metric
+    name and a tuple of label values.
+
+    With a directory, the process writes a snapshot to <directory>/<pid>.json
+    at most every `flush_interval` seconds and `collect()` merges the
+    snapshots of every process.
+    """
+
+    def __init__(self, directory=None, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._next_flush = 0
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        index = bisect_left(HISTOGRAM_BUCKETS[name], value)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(HISTOGRAM_BUCKETS[name]) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += value
+        self._maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, list(labels), list(counts), total]
+                    for (name, labels), (counts, total) in self.histograms.items()
+                ],
+            }
+
+    def _maybe_flush(self):
+        if self.directory is not None and time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        self._next_flush = time.monotonic() + self.flush_interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        tmp = self.directory / f'.{pid}.{threading.get_ident()}.tmp'
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, self.directory / f'{pid}.json')
+
+    def collect(self):
+        """
+        Return the merged snapshots of every process, this one taken live.
+        """
+        snapshots = [self.snapshot()]
+        if self.directory is not None:
+            own = f'{os.getpid()}.json'
+            for path in self.directory.glob('*.json'):
+                if path.name == own:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+
+        counters, histograms = {}, {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts, total in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [[0] * len(counts), 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+        return counters, histograms
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+def render(counters, histograms):
+    """
+    Format merged metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+            continue
+
+        bounds = [repr(float(bound)) for bound in HISTOGRAM_BUCKETS[name]] + ['+Inf']
+        for (metric, labels), (counts, total) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {total}')
+            lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def view_label(resolver_match, method):
+    """
+    Name the view a request resolved to: 'ArticleViewSet.list' for viewset
+    actions, the class name for other class-based views and the function
+    name otherwise.
+    """
+    if resolver_match is None:
+        return 'unmatched'
+    func = resolver_match.func
+    cls = getattr(func, 'cls', None)
+    if cls is None:
+        return getattr(func, '__qualname__', type(func).__name__)
+    actions = getattr(func, 'actions', None)
+    if actions:
+        action = actions.get(method.lower())
+        if action:
+            return f'{cls.__name__}.{action}'
+    return cls.__name__
+
+
+def metrics_view(request):
+    return HttpResponse(render(*registry.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+registry = Registry(METRICS_DIR)
@@ -0,0 +1,206 @@
+import cProfile
+import json
+import logging
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import instrumentation, metrics, profiling, replicas
+
+logger = logging.getLogger('api.requests')
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count and time the SQL each request runs, add a Server-Timing header with
+    the db, serialize, render and total phases, and log one JSON line per
+    request with the slowest statements and repeated query fingerprints.
+
+    Statements one serializer method runs QUERY_N_PLUS_ONE_THRESHOLD times or
+    more are logged as a warning naming the method. The serialize phase
+    includes any queries the serializers run, so phases may overlap.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        record = instrumentation.RequestRecord()
+        token = instrumentation.current.set(record)
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.current.reset(token)
+        return self.finish(request, response, record)
+
+    async def __acall__(self, request):
+        record = instrumentation.RequestRecord()
+        token = instrumentation.current.set(record)
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.current.reset(token)
+        return self.finish(request, response, record)
+
+    def finish(self, request, response, record):
+        # Streamed bodies are produced after this point and are not included.
+        total = time.perf_counter() - record.started
+        db_time = record.db_time
+        count = len(record.queries)
+
+        timings = [f'db;dur={db_time * 1000:.1f};desc="{count} queries"']
+        for phase in ('serialize', 'render'):
+            if phase in record.timings:
+                timings.append(f'{phase};dur={record.timings[phase] * 1000:.1f}')
+        timings.append(f'total;dur={total * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': count,
+            'db_ms': round(db_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'slowest': [
+                {'sql': sql, 'ms': round(duration * 1000, 2), 'origin': origin}
+                for sql, duration, origin in record.slowest()
+            ],
+            'duplicates': [{'sql': sql, 'count': repeats} for sql, repeats in record.duplicates().items()],
+        }))
+
+        for (origin, sql), repeats in record.n_plus_one().items():
+            logger.warning(
+                'Possible N+1: %s ran the same query %d times during %s %s: %s',
+                origin, repeats, request.method, request.path, sql
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled requests with cProfile and write one .prof file each to
+    PROFILING_DIR; `manage.py profile_report` aggregates them.
+
+    Requests are eligible when they carry a valid X-Profile token or come from
+    a staff user, and PROFILING_SAMPLE_RATE of those are profiled. Without
+    PROFILING_DIR the middleware removes itself at startup. Keep it last in
+    MIDDLEWARE so the profile covers the view and response rendering.
+    """
+
+    def __init__(self, get_response):
+        if not profiling.PROFILING_DIR:
+            raise MiddlewareNotUsed
+        Path(profiling.PROFILING_DIR).mkdir(parents=True, exist_ok=True)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running in this thread.
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        profiler.dump_stats(profiling.output_path(request))
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Count requests and record their latency in the metrics registry, labelled
+    with the view they resolved to. Keep it first in MIDDLEWARE so the
+    latency covers the other middleware too; streamed bodies are not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, duration):
+        view = metrics.view_label(getattr(request, 'resolver_match', None), request.method)
+        labels = (('view', view), ('method', request.method))
+        metrics.registry.inc('api_requests_total', labels + (('status', str(response.status_code)),))
+        metrics.registry.observe('api_request_duration_seconds', labels, duration)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the request's reads to a replica through ReplicaRouter, and after a
+    successful write set a cookie that keeps the client on the primary for
+    READ_YOUR_WRITES_WINDOW seconds so it reads its own writes.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replicas.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        token = replicas.current.set(replicas.read_alias(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.current.reset(token)
+        return self.stick(request, response)
+
+    async def __acall__(self, request):
+        token = replicas.current.set(replicas.read_alias(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            replicas.current.reset(token)
+        return self.stick(request, response)
+
+    def stick(self, request, response):
+        if request.method not in replicas.SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                replicas.STICKY_COOKIE, '1', max_age=replicas.READ_YOUR_WRITES_WINDOW, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:51
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_favorites_count(apps, schema_editor):
+    Article = apps.get_model('api', 'Article')
+    favorites = (
+        Article.favorited_by.through.objects.filter(article_id=OuterRef('pk'))
+        .order_by().values('article_id').annotate(total=Count('pk')).values('total')
+    )
+    Article.objects.update(favorites_count=Coalesce(Subquery(favorites, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_add_article_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_favorites_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-favorites_count', '-id'], name='article_favorites_count_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE articles ADD FULLTEXT INDEX article_fulltext_idx (title, description, body)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(title, description, body)')
+        schema_editor.execute(
+            'INSERT INTO articles_fts (rowid, title, description, body) '
+            'SELECT id, title, description, body FROM articles'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE articles DROP INDEX article_fulltext_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS articles_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_add_favorites_count_to_article'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
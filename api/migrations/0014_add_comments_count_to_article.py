@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:04
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comments_count(apps, schema_editor):
+    Article = apps.get_model('api', 'Article')
+    Comment = apps.get_model('api', 'Comment')
+    comments = (
+        Comment.objects.filter(article_id=OuterRef('pk'))
+        .order_by().values('article_id').annotate(total=Count('pk')).values('total')
+    )
+    Article.objects.update(comments_count=Coalesce(Subquery(comments, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_add_article_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_comments_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', '-created_at', '-id'], name='comment_article_created_idx'),
+        ),
+    ]
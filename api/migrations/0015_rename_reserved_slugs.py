@@ -0,0 +1,27 @@
+import uuid
+
+from django.db import migrations
+from django.utils import timezone
+
+# List routes of ArticleViewSet that existing article slugs may shadow.
+RESERVED_SLUGS = ('feed', 'search', 'export')
+
+
+def rename_reserved_slugs(apps, schema_editor):
+    Article = apps.get_model('api', 'Article')
+    for article in Article.objects.filter(slug__in=RESERVED_SLUGS).only('pk', 'slug'):
+        # updated_at moves too so cached fragments carrying the old slug retire.
+        Article.objects.filter(pk=article.pk).update(
+            slug=f'{article.slug}-{uuid.uuid4().hex[:8]}', updated_at=timezone.now()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_add_comments_count_to_article'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_reserved_slugs, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Value
+from django.db.models.signals import m2m_changed
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.conf import settings
 
@@ -64,6 +66,33 @@ class Tag(models.Model):
         verbose_name = 'Tag'
         verbose_name_plural = 'Tags'
 
+# Article queryset
+class ArticleQuerySet(models.QuerySet):
+    def with_listing_data(self, user=None):
+        """
+        Load everything ArticleSerializer renders in a fixed number of queries:
+        author and profile are joined, tags are prefetched in one query and the
+        favorite/following state is computed with correlated subqueries.
+        """
+        queryset = self.select_related('author__profile').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.only('id', 'name'))
+        )
+        return queryset.with_viewer_state(user)
+
+    def with_viewer_state(self, user=None):
+        """
+        Annotate is_favorited and author_followed for the viewer.
+        """
+        if user is not None and user.is_authenticated:
+            favorites = Article.favorited_by.through.objects.filter(article_id=OuterRef('pk'), user_id=user.id)
+            follows = Profile.follows.through.objects.filter(
+                from_profile__user_id=user.id,
+                to_profile_id=OuterRef('author__profile__id')
+            )
+            return self.annotate(is_favorited=Exists(favorites), author_followed=Exists(follows))
+
+        return self.annotate(is_favorited=Value(False), author_followed=Value(False))
+
 # Article model
 class Article(models.Model):
     title = models.CharField(max_length=255)
@@ -77,17 +106,83 @@ class Article(models.Model):
         related_name='favorite_articles',
         blank=True
     )
+    favorites_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ArticleQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    def add_favorite(self, user):
+        """
+        Favorite the article for the user. Returns False if it already was.
+
+        The through row is inserted against its unique constraint and the
+        counter is bumped with F() in the same transaction, so concurrent
+        requests cannot double count.
+        """
+        through = Article.favorited_by.through
+        try:
+            with transaction.atomic():
+                through.objects.create(article_id=self.pk, user_id=user.pk)
+                Article.objects.filter(pk=self.pk).update(favorites_count=F('favorites_count') + 1)
+        except IntegrityError:
+            return False
+
+        self._favorites_changed('post_add', user)
+        return True
+
+    def remove_favorite(self, user):
+        """
+        Unfavorite the article for the user. Returns False if it was not favorited.
+        """
+        through = Article.favorited_by.through
+        with transaction.atomic():
+            deleted, _ = through.objects.filter(article_id=self.pk, user_id=user.pk).delete()
+            if not deleted:
+                return False
+            Article.objects.filter(pk=self.pk, favorites_count__gt=0).update(favorites_count=F('favorites_count') - 1)
+
+        self._favorites_changed('post_remove', user)
+        return True
+
+    def _favorites_changed(self, action, user):
+        m2m_changed.send(
+            sender=Article.favorited_by.through, instance=self, action=action,
+            reverse=False, model=type(user), pk_set={user.pk}, using=self._state.db
+        )
+
     class Meta:
         db_table = 'articles'
         ordering = ['-created_at']
         verbose_name = 'Article'
         verbose_name_plural = 'Articles'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='article_created_id_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='article_author_created_id_idx'),
+            models.Index(fields=['-favorites_count', '-id'], name='article_favorites_count_idx')
+        ]
+
+# Comment queryset
+class CommentQuerySet(models.QuerySet):
+    def with_author_data(self, user=None):
+        """
+        Join each comment's author and profile and annotate whether the viewer
+        follows the author, so CommentSerializer needs no further queries.
+        """
+        queryset = self.select_related('author__profile')
+
+        if user is not None and user.is_authenticated:
+            follows = Profile.follows.through.objects.filter(
+                from_profile__user_id=user.id,
+                to_profile_id=OuterRef('author__profile__id')
+            )
+            return queryset.annotate(author_followed=Exists(follows))
+
+        return queryset.annotate(author_followed=Value(False))
 
 # Comment model
 class Comment(models.Model):
@@ -97,11 +192,55 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
     def __str__(self):
         return f"Comment by {self.author} on {self.article}"
 
+    def save(self, *args, **kwargs):
+        """
+        Keep Article.comments_count in step with new comments, in the same
+        transaction as the insert.
+        """
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Article.objects.filter(pk=self.article_id).update(comments_count=F('comments_count') + 1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Article.objects.filter(pk=self.article_id, comments_count__gt=0).update(comments_count=F('comments_count') - 1)
+        return result
+
     class Meta:
         db_table = 'comments'
         ordering = ['-created_at']
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
+        indexes = [
+            models.Index(fields=['article', '-created_at', '-id'], name='comment_article_created_idx')
+        ]
+
+# Timeline entry model
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.article} in {self.user}'s feed"
+
+    class Meta:
+        db_table = 'timelines'
+        ordering = ['-created_at']
+        verbose_name = 'Timeline entry'
+        verbose_name_plural = 'Timeline entries'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'article'], name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='timeline_user_created_idx')
+        ]
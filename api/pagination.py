@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+# Largest page of comments a client can ask for with ?limit=.
+COMMENTS_MAX_LIMIT = getattr(settings, 'COMMENTS_MAX_LIMIT', 100)
+
+
+def encode_cursor(created_at, pk):
+    payload = json.dumps([created_at.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+
+
+def keyset_queryset(queryset, cursor):
+    """
+    Order by (created_at, id) descending and skip everything up to `cursor`.
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return queryset
+
+
+def keyset_result(rows, limit):
+    """
+    Trim rows fetched with limit + 1 to the page and compute its next cursor.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].pk)
+    return rows, None
+
+
+def keyset_page(queryset, cursor, limit, load=list):
+    """
+    Return (rows, next_cursor) for the page that follows `cursor`, newest first.
+
+    Rows are ordered by (created_at, id) descending and the cursor is the last
+    row seen, so every page is an index range scan regardless of its depth.
+    An empty cursor starts from the first page. `load` turns the sliced
+    queryset into rows.
+    """
+    queryset = keyset_queryset(queryset, cursor)
+    if limit <= 0:
+        return [], cursor or None
+    return keyset_result(load(queryset[:limit + 1]), limit)
@@ -0,0 +1,69 @@
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+# Directory per-request .prof files are written to; profiling is off when unset.
+PROFILING_DIR = getattr(settings, 'PROFILING_DIR', None)
+
+# Share of eligible requests that are profiled.
+PROFILING_SAMPLE_RATE = getattr(settings, 'PROFILING_SAMPLE_RATE', 1.0)
+
+# Seconds a token from `manage.py profiling_token` is accepted.
+PROFILING_TOKEN_MAX_AGE = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+
+# Request header carrying the signed token.
+PROFILING_HEADER = 'HTTP_X_PROFILE'
+
+SALT = 'api.profiling'
+UNSAFE_CHARS_RE = re.compile(r'[^A-Za-z0-9]+')
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def valid_token(value):
+    try:
+        return signing.TimestampSigner(salt=SALT).unsign(value, max_age=PROFILING_TOKEN_MAX_AGE) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+def is_staff(request):
+    """
+    True for staff users, whether signed in with a session or a JWT.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    if 'HTTP_AUTHORIZATION' not in request.META:
+        return False
+
+    from .authentication import CachedJWTAuthentication
+
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except Exception:
+        return False
+    return result is not None and result[0].is_staff
+
+
+def should_profile(request):
+    token = request.META.get(PROFILING_HEADER)
+    if not (token and valid_token(token)) and not is_staff(request):
+        return False
+    return random.random() < PROFILING_SAMPLE_RATE
+
+
+def output_path(request):
+    """
+    Return a unique .prof path named after the time, method and path.
+    """
+    name = UNSAFE_CHARS_RE.sub('-', request.path).strip('-') or 'root'
+    stamp = time.strftime('%Y%m%dT%H%M%S')
+    return Path(PROFILING_DIR) / f'{stamp}-{request.method}-{name[:80]}-{uuid.uuid4().hex[:8]}.prof'
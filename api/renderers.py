@@ -0,0 +1,50 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes in one pass with orjson, which formats datetimes
+    natively. Strings, integers, booleans, None, datetimes and containers of
+    them come out as the same bytes as the stock renderer, which covers every
+    payload the API builds.
+
+    Floats do not: orjson writes exponents without a plus sign or leading
+    zero (1e16, not 1e+16), and NaN and infinities become null where the
+    stock renderer raises ValueError. Responses that may carry floats should
+    be rendered by JSONRenderer.
+
+    Falls back to JSONRenderer when orjson is not installed, when indented
+    output is asked for, when the JSON settings differ from DRF's defaults, or
+    for values orjson cannot encode, such as integers beyond 64 bits.
+    """
+
+    def stock_options(self):
+        return self.compact and not self.ensure_ascii and self.strict
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self.stock_options() or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=ORJSON_OPTIONS)
+        except (TypeError, ValueError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping JSONRenderer applies so the output is also valid JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,51 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Aliases in DATABASES that replicate 'default' and serve safe-method requests.
+DATABASE_REPLICAS = getattr(settings, 'DATABASE_REPLICAS', [])
+
+# Seconds a client keeps reading from the primary after a write.
+READ_YOUR_WRITES_WINDOW = getattr(settings, 'READ_YOUR_WRITES_WINDOW', 10)
+
+# Cookie set on successful writes; while present reads stay on the primary.
+STICKY_COOKIE = 'read_primary'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Alias reads of the current request go to; None means 'default'.
+current = ContextVar('read_database', default=None)
+
+
+def read_alias(request):
+    """
+    Pick a random replica for safe-method requests from clients that have not
+    written within READ_YOUR_WRITES_WINDOW; everything else reads the primary.
+    """
+    if request.method not in SAFE_METHODS or STICKY_COOKIE in request.COOKIES:
+        return None
+    return random.choice(DATABASE_REPLICAS)
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica picked for the current request and all writes
+    and migrations to 'default'. Outside a request, e.g. in management
+    commands and signal handlers run by them, everything uses 'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return current.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in DATABASE_REPLICAS
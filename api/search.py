@@ -0,0 +1,234 @@
+import math
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .models import Article
+
+# Dotted path of the SearchBackend to use; None picks one from the database vendor.
+SEARCH_BACKEND = getattr(settings, 'SEARCH_BACKEND', None)
+
+# Relative weight of a match in each searchable field.
+FIELD_WEIGHTS = {'title': 10.0, 'description': 5.0, 'body': 1.0}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class SearchBackend(ABC):
+    """
+    Full-text index over Article title, description and body.
+
+    `search()` returns (article ids ordered by relevance, total matches). An
+    article matches when it contains every word of the query.
+    """
+
+    def index(self, article):
+        pass
+
+    def remove(self, article_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    @abstractmethod
+    def search(self, query, limit, offset):
+        pass
+
+
+class MySQLFullTextBackend(SearchBackend):
+    """
+    Uses the FULLTEXT index on articles(title, description, body), which MySQL
+    keeps current on every write. Every word is required through BOOLEAN MODE
+    and matches are ranked by their NATURAL LANGUAGE MODE relevance.
+    """
+
+    match = 'MATCH(title, description, body) AGAINST (%s IN BOOLEAN MODE)'
+    rank = 'MATCH(title, description, body) AGAINST (%s IN NATURAL LANGUAGE MODE)'
+
+    # Words shorter than innodb_ft_min_token_size are not indexed, so requiring
+    # them would match nothing.
+    min_token_size = 3
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute('OPTIMIZE TABLE articles')
+
+    def search(self, query, limit, offset):
+        tokens = [token for token in tokenize(query) if len(token) >= self.min_token_size]
+        if not tokens:
+            return [], 0
+
+        required = ' '.join(f'+"{token}"' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM articles WHERE {self.match} ORDER BY {self.rank} DESC, id DESC LIMIT %s OFFSET %s',
+                [required, query, limit, offset]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f'SELECT COUNT(*) FROM articles WHERE {self.match}', [required])
+            total = cursor.fetchone()[0]
+        return ids, total
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Keeps an FTS5 virtual table, articles_fts, whose rowid is the article id.
+    Meant for local runs on SQLite.
+    """
+
+    table = 'articles_fts'
+
+    def ensure_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5(title, description, body)')
+
+    def index(self, article):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [article.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description, body) VALUES (%s, %s, %s, %s)',
+                [article.pk, article.title, article.description, article.body]
+            )
+
+    def remove(self, article_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [article_id])
+
+    def rebuild(self):
+        self.ensure_table()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description, body) '
+                f'SELECT id, title, description, body FROM articles'
+            )
+
+    def search(self, query, limit, offset):
+        terms = ' '.join('"{}"'.format(token.replace('"', '""')) for token in tokenize(query))
+        if not terms:
+            return [], 0
+
+        weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS.values())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY bm25({self.table}, {weights}), rowid DESC LIMIT %s OFFSET %s',
+                [terms, limit, offset]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table} WHERE {self.table} MATCH %s', [terms])
+            total = cursor.fetchone()[0]
+        return ids, total
+
+
+class InMemoryBackend(SearchBackend):
+    """
+    Pure-Python inverted index ranked by field-weighted TF-IDF.
+
+    The index lives in the process, is built from the database on first use
+    and is then updated incrementally by the writes this process handles, so
+    it suits single-process deployments and tests.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _document(self, article):
+        weights = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(article, field)):
+                weights[token] += weight
+        return weights
+
+    def _add(self, article_id, weights):
+        self._documents[article_id] = weights
+        for token, weight in weights.items():
+            self._postings[token][article_id] = weight
+
+    def _discard(self, article_id):
+        for token in self._documents.pop(article_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(article_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.rebuild()
+
+    def index(self, article):
+        weights = self._document(article)
+        with self._lock:
+            if self._loaded:
+                self._discard(article.pk)
+                self._add(article.pk, weights)
+
+    def remove(self, article_id):
+        with self._lock:
+            self._discard(article_id)
+
+    def rebuild(self):
+        articles = Article.objects.only('id', 'title', 'description', 'body').iterator(chunk_size=1000)
+        documents = [(article.pk, self._document(article)) for article in articles]
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            for article_id, weights in documents:
+                self._add(article_id, weights)
+            self._loaded = True
+
+    def search(self, query, limit, offset):
+        self._ensure_loaded()
+        tokens = set(tokenize(query))
+        if not tokens:
+            return [], 0
+
+        scores = Counter()
+        with self._lock:
+            total_documents = len(self._documents) or 1
+            postings = [self._postings.get(token) for token in tokens]
+            if not all(postings):
+                return [], 0
+
+            matches = set(min(postings, key=len)).intersection(*postings)
+            for posting in postings:
+                idf = math.log(1 + total_documents / len(posting))
+                for article_id in matches:
+                    scores[article_id] += posting[article_id] * idf
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [article_id for article_id, _ in ranked[offset:offset + limit]], len(ranked)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if SEARCH_BACKEND:
+                    _backend = import_string(SEARCH_BACKEND)()
+                elif connection.vendor == 'mysql':
+                    _backend = MySQLFullTextBackend()
+                elif connection.vendor == 'sqlite':
+                    _backend = SQLiteFTS5Backend()
+                else:
+                    _backend = InMemoryBackend()
+    return _backend
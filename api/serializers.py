@@ -1,9 +1,8 @@
 from rest_framework import serializers
 from .models import User, Profile, Article, Tag, Comment
-from rest_framework_simplejwt.tokens import RefreshToken
+from . import fragments, search, slugs, timeline, tokens
+from .instrumentation import timed
 from django.contrib.auth import authenticate
-from django.utils.text import slugify
-import uuid
 
 # Serializer for the current user
 class CurrentUserSerializer(serializers.ModelSerializer):
@@ -42,8 +41,7 @@ class RegistrationSerializer(serializers.Serializer):
 
         Profile.objects.create(user=user)
 
-        refresh = RefreshToken.for_user(user)
-        self.token = str(refresh.access_token)
+        self.token = tokens.access_token_for(user)
 
         return user
     
@@ -82,8 +80,7 @@ class LoginSerializer(serializers.Serializer):
     def get_user_data(self, obj):
         user_instance = obj.get('user')
 
-        refresh = RefreshToken.for_user(user_instance)
-        access_token = str(refresh.access_token)
+        access_token = tokens.access_token_for(user_instance)
         self.token = access_token
         user_data = CurrentUserSerializer(user_instance).data
         user_data['token'] = access_token
@@ -101,6 +98,14 @@ class AuthorProfileSerializer(serializers.ModelSerializer):
         fields = ['username', 'bio', 'image', 'following']
 
     def get_following(self, obj):
+        is_followed = getattr(obj, 'is_followed', None)
+        if is_followed is not None:
+            return is_followed
+
+        loader = self.context.get('profiles')
+        if loader:
+            return loader.is_following(obj)
+
         request = self.context.get('request')
 
         if request and request.user.is_authenticated:
@@ -110,6 +115,40 @@ class AuthorProfileSerializer(serializers.ModelSerializer):
 
         return False
 
+class ArticleListSerializer(serializers.ListSerializer):
+    @timed('serialize')
+    def to_representation(self, data):
+        articles = list(data.all() if hasattr(data, 'all') else data)
+        child = self.child
+        if child.fragment_cache is not None:
+            # Fragments were fetched by adata(), which also stores new ones.
+            return super().to_representation(articles)
+        child.fragment_cache, child.rendered_fragments = fragments.get_many(articles), []
+        representation = super().to_representation(articles)
+        fragments.set_many(child.rendered_fragments)
+        child.fragment_cache = child.rendered_fragments = None
+        return representation
+
+
+async def adata(serializer):
+    """
+    `serializer.data` for an ArticleSerializer, single or many=True, in async
+    views: fragments are read and stored with the async cache API so the
+    event loop does not block on the cache.
+    """
+    many = isinstance(serializer, serializers.ListSerializer)
+    articles = list(serializer.instance) if many else [serializer.instance]
+    article_serializer = serializer.child if many else serializer
+    article_serializer.fragment_cache = await fragments.aget_many(articles)
+    article_serializer.rendered_fragments = []
+    try:
+        data = serializer.data
+        await fragments.aset_many(article_serializer.rendered_fragments)
+    finally:
+        article_serializer.fragment_cache = article_serializer.rendered_fragments = None
+    return data
+
+
 class ArticleSerializer(serializers.ModelSerializer):
     title = serializers.CharField(max_length=255, required=True)
     description = serializers.CharField(max_length=255, required=True)
@@ -121,6 +160,7 @@ class ArticleSerializer(serializers.ModelSerializer):
     updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
     favorited = serializers.SerializerMethodField()
     favoritesCount = serializers.SerializerMethodField()
+    commentsCount = serializers.IntegerField(source='comments_count', read_only=True)
     author = serializers.SerializerMethodField()
 
     class Meta:
@@ -128,14 +168,71 @@ class ArticleSerializer(serializers.ModelSerializer):
 
         fields = [
             'slug', 'title', 'description', 'body', 'tagList',
-            'createdAt', 'updatedAt', 'favorited', 'favoritesCount', 'author'
+            'createdAt', 'updatedAt', 'favorited', 'favoritesCount', 'commentsCount', 'author'
         ]
 
-        read_only_fields = ['slug', 'createdAt', 'updatedAt', 'favorited', 'favoritesCount', 'author']
+        read_only_fields = ['slug', 'createdAt', 'updatedAt', 'favorited', 'favoritesCount', 'commentsCount', 'author']
+        list_serializer_class = ArticleListSerializer
+
+    # Fragments fetched and rendered by ArticleListSerializer for the current page.
+    fragment_cache = None
+    rendered_fragments = None
+
+    @timed('serialize')
+    def to_representation(self, instance):
+        """
+        Serve the viewer-independent part of the article from its cached
+        fragment, keyed on updated_at, and overlay the viewer's favorited and
+        following flags plus the counters, which change without updated_at.
+        """
+        favorited = self.get_favorited(instance)
+        following = self.get_author_following(instance)
+
+        if self.fragment_cache is not None:
+            fragment = self.fragment_cache.get(instance.pk)
+        else:
+            fragment = fragments.get_many([instance]).get(instance.pk)
+
+        if fragment is None:
+            fragment = self.render_fragment(instance, favorited, following)
+            if self.rendered_fragments is not None:
+                self.rendered_fragments.append((instance, fragment))
+            else:
+                fragments.set_many([(instance, fragment)])
+
+        data = dict(fragment)
+        data['favorited'] = favorited
+        data['favoritesCount'] = instance.favorites_count
+        data['commentsCount'] = instance.comments_count
+        if data['author'] is not None:
+            data['author'] = {**data['author'], 'following': following}
+        return data
+
+    def render_fragment(self, instance, favorited, following):
+        # Reuse the flags already resolved so rendering needs no extra queries,
+        # then blank them so the cached fragment holds no viewer state.
+        instance.is_favorited = favorited
+        instance.author_followed = following
+        data = super().to_representation(instance)
+        data['favorited'] = False
+        if data['author'] is not None:
+            data['author']['following'] = False
+        return data
+
+    def get_author_following(self, obj):
+        if hasattr(obj, 'author_followed'):
+            return obj.author_followed
+
+        profile = getattr(obj.author, 'profile', None)
+        if profile is None:
+            return False
+        return AuthorProfileSerializer(context=self.context).get_following(profile)
 
     def get_author(self, obj):
         profile = getattr(obj.author, 'profile', None)
         if profile:
+            if hasattr(obj, 'author_followed'):
+                profile.is_followed = obj.author_followed
             return AuthorProfileSerializer(profile, context=self.context).data
         return None
 
@@ -146,58 +243,101 @@ class ArticleSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         tag_names = getattr(self, '_tag_list', [])
-        title = validated_data.get('title')
-        base_slug = slugify(title)
-        validated_data['slug'] = f"{base_slug}"
-
-        while Article.objects.filter(slug=validated_data['slug']).exists():
-            unique_id = str(uuid.uuid4()).split('-')[0]
-            validated_data['slug'] = f"{base_slug}-{unique_id}"
+        article = slugs.allocate(
+            validated_data.get('title'),
+            lambda slug: Article.objects.create(slug=slug, **validated_data)
+        )
 
-        article = Article.objects.create(**validated_data)
+        tags = self.resolve_tags(tag_names)
+        if tags:
+            article.tags.add(*tags)
 
-        for tag_name in tag_names:
-            tag, created = Tag.objects.get_or_create(name=tag_name)
-            article.tags.add(tag)
+        timeline.push(article)
+        search.backend().index(article)
 
         return article
 
     def update(self, instance, validated_data):
         tag_names = getattr(self, '_tag_list', None)
-        if 'title' in validated_data and validated_data['title'] != instance.title:
-            base_slug = slugify(validated_data['title'])
-            new_slug = base_slug
-
-            while Article.objects.filter(slug=new_slug).exists():
-                unique_id = str(uuid.uuid4()).split('-')[0]
-                new_slug = f"{base_slug}-{unique_id}"
-
-            validated_data['slug'] = new_slug
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-
-        instance.save()
+        changed_fields = [attr for attr, value in validated_data.items() if getattr(instance, attr) != value]
+        for attr in changed_fields:
+            setattr(instance, attr, validated_data[attr])
 
+        tags_to_add, tags_to_remove = [], []
         if tag_names is not None:
-            instance.tags.clear()
-            for tag_name in tag_names:
-                tag, created = Tag.objects.get_or_create(name=tag_name)
-                instance.tags.add(tag)
+            tags = self.resolve_tags(tag_names)
+            current = {tag.pk: tag for tag in instance.tags.all()}
+            wanted = {tag.pk: tag for tag in tags}
+            tags_to_add = [tag for pk, tag in wanted.items() if pk not in current]
+            tags_to_remove = [tag for pk, tag in current.items() if pk not in wanted]
+
+        if 'title' in changed_fields:
+            def save(slug):
+                instance.slug = slug
+                instance.save(update_fields=changed_fields + ['slug', 'updated_at'])
+
+            slugs.allocate(instance.title, save)
+        elif changed_fields or tags_to_add or tags_to_remove:
+            instance.save(update_fields=changed_fields + ['updated_at'])
+
+        if tags_to_remove:
+            instance.tags.remove(*tags_to_remove)
+        if tags_to_add:
+            instance.tags.add(*tags_to_add)
+
+        if {'title', 'description', 'body'} & set(changed_fields):
+            search.backend().index(instance)
         
         return instance
 
+    def resolve_tags(self, tag_names):
+        """
+        Return Tag rows for the names, in order and without duplicates, using
+        one lookup plus one bulk insert for names that do not exist yet.
+
+        Under a case- or accent-insensitive collation, as on MySQL, a name can
+        match a row spelled differently; such names are looked up one by one
+        so the database decides which row they mean.
+        """
+        tag_names = list(dict.fromkeys(tag_names))
+        if not tag_names:
+            return []
+
+        tags = {tag.name: tag for tag in Tag.objects.filter(name__in=tag_names)}
+        missing = [name for name in tag_names if name not in tags]
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+
+        for name in tag_names:
+            if name not in tags:
+                tags[name] = Tag.objects.get_or_create(name=name)[0]
+
+        return list({tags[name].pk: tags[name] for name in tag_names}.values())
+
     def get_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+
         if self.context.get('request') and self.context['request'].user.is_authenticated:
             return obj.favorited_by.filter(id=self.context['request'].user.id).exists()
         return False
 
     def get_favoritesCount(self, obj):
-        return obj.favorited_by.count()
+        return obj.favorites_count
 
     def get_tagList(self, obj):
         return [tag.name for tag in obj.tags.all()]
 
+class CommentListSerializer(serializers.ListSerializer):
+    @timed('serialize')
+    def to_representation(self, data):
+        comments = list(data.all() if hasattr(data, 'all') else data)
+        loader = self.context.get('profiles')
+        if loader:
+            loader.prime(comment.author_id for comment in comments if not hasattr(comment, 'author_followed'))
+        return super().to_representation(comments)
+
 class CommentSerializer(serializers.ModelSerializer):
     body = serializers.CharField(required=True)
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
@@ -209,9 +349,16 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ['id', 'body', 'createdAt', 'updatedAt', 'author']
         read_only_fields = ['id', 'createdAt', 'updatedAt', 'author']
+        list_serializer_class = CommentListSerializer
 
     def get_author(self, obj):
-        profile = getattr(obj.author, 'profile', None)
+        loader = self.context.get('profiles')
+        if loader and not hasattr(obj, 'author_followed'):
+            profile = loader.profile_for(obj.author_id)
+        else:
+            profile = getattr(obj.author, 'profile', None)
+            if profile and hasattr(obj, 'author_followed'):
+                profile.is_followed = obj.author_followed
         if profile:
             return AuthorProfileSerializer(profile, context=self.context).data
         return None
@@ -273,6 +420,14 @@ class ProfileSerializer(serializers.ModelSerializer):
         fields = ['username', 'bio', 'image', 'following']
 
     def get_following(self, obj):
+        is_followed = getattr(obj, 'is_followed', None)
+        if is_followed is not None:
+            return is_followed
+
+        loader = self.context.get('profiles')
+        if loader:
+            return loader.is_following(obj)
+
         request = self.context.get('request')
 
         if request and request.user.is_authenticated:
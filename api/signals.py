@@ -0,0 +1,111 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import counts, fragments, tag_cloud
+from .authentication import principals
+from .models import Article, Profile, Tag, User
+from .tag_index import index as tag_index
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, created, **kwargs):
+    if created:
+        counts.invalidate()
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    counts.invalidate()
+    fragments.invalidate([(instance.pk, instance.updated_at)])
+    tag_cloud.invalidate()
+    tag_index.discard_article(instance.pk)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+@receiver(m2m_changed, sender=Article.favorited_by.through)
+def article_links_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        counts.invalidate()
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # Remember the stored username so user_changed can tell a rename apart
+    # from any other save.
+    if instance.pk is None or (update_fields is not None and 'username' not in update_fields):
+        instance._saved_username = instance.username
+    else:
+        instance._saved_username = sender.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    principals.invalidate(instance.pk)
+    if kwargs['signal'] is post_delete or instance._saved_username != instance.username:
+        fragments.invalidate_author(instance.pk)
+        # Counts are cached per author= and favorited= username.
+        counts.invalidate()
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    principals.invalidate(instance.user_id)
+    fragments.invalidate_author(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        tag_cloud.invalidate()
+
+    if action == 'pre_clear':
+        if reverse:
+            instance._cleared_article_ids = list(instance.articles.values_list('pk', flat=True))
+        else:
+            instance._cleared_tag_names = list(instance.tags.values_list('name', flat=True))
+        return
+
+    if action == 'post_clear':
+        if reverse:
+            tag_index.remove([instance.name], getattr(instance, '_cleared_article_ids', []))
+            fragments.invalidate_ids(getattr(instance, '_cleared_article_ids', []))
+        else:
+            tag_index.remove(getattr(instance, '_cleared_tag_names', []), [instance.pk])
+            fragments.invalidate([(instance.pk, instance.updated_at)])
+        return
+
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if reverse:
+        tag_names, article_ids = [instance.name], pk_set
+        fragments.invalidate_ids(pk_set)
+    else:
+        tag_names, article_ids = Tag.objects.filter(pk__in=pk_set).values_list('name', flat=True), [instance.pk]
+        fragments.invalidate([(instance.pk, instance.updated_at)])
+
+    if action == 'post_add':
+        tag_index.add(tag_names, article_ids)
+    else:
+        tag_index.remove(tag_names, article_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, created=False, **kwargs):
+    tag_cloud.invalidate()
+    if not created:
+        tag_index.invalidate()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_articles_changed(sender, instance, created=False, **kwargs):
+    # A renamed or deleted tag changes the tagList of its articles. Deleting a
+    # tag drops its links without m2m_changed, so this runs before the delete.
+    if not created:
+        fragments.invalidate_tag(instance)
@@ -0,0 +1,59 @@
+import uuid
+from functools import cache
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from .models import Article
+
+# Attempts made before giving up on a slug; the first uses the bare title slug,
+# the others add a random suffix.
+SLUG_MAX_ATTEMPTS = getattr(settings, 'SLUG_MAX_ATTEMPTS', 5)
+
+
+@cache
+def reserved_slugs():
+    """
+    Return the url_path of every list route on the articles viewset, such as
+    feed; an article with one of these slugs would be shadowed by the route.
+    """
+    from .views import ArticleViewSet
+
+    return frozenset(action.url_path for action in ArticleViewSet.get_extra_actions() if not action.detail)
+
+
+def with_suffix(base_slug):
+    return f"{base_slug}-{uuid.uuid4().hex[:8]}"
+
+
+def is_taken(slug):
+    """
+    Whether an article holds the slug. Asked after a failed save, when the
+    conflicting row, if any, has been committed; backends word and number
+    their unique-violation errors differently, so the message is not used.
+    """
+    return Article.objects.filter(slug=slug).exists()
+
+
+def allocate(title, save):
+    """
+    Call `save(slug)` with candidate slugs for the title until one is accepted
+    by the unique index on articles.slug, and return what `save` returned.
+
+    Collisions are detected from the IntegrityError raised by the insert or
+    update itself, so exists() only runs after a failed attempt and two
+    concurrent requests cannot both claim the same slug. Slugs of the
+    viewset's list routes are treated as taken.
+    """
+    base_slug = slugify(title)
+    slug = with_suffix(base_slug) if base_slug in reserved_slugs() else base_slug
+
+    for attempt in range(SLUG_MAX_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return save(slug)
+        except IntegrityError:
+            if attempt == SLUG_MAX_ATTEMPTS - 1 or not is_taken(slug):
+                raise
+        slug = with_suffix(base_slug)
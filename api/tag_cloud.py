@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils.http import quote_etag
+
+from .cache_versions import CacheVersion
+from .counts import primary
+from .models import Tag
+
+TAGS_CACHE_TIMEOUT = getattr(settings, 'TAGS_CACHE_TIMEOUT', 3600)
+
+_version = CacheVersion('tags:version')
+
+version = _version.get
+aversion = _version.aget
+
+
+def invalidate():
+    transaction.on_commit(_version.bump)
+
+
+def _entries_key(current_version):
+    return f'tags:cloud:{current_version}'
+
+
+def build():
+    tags = primary(Tag.objects).annotate(articles_count=Count('articles')).order_by('name')
+    return list(tags.values_list('name', 'articles_count'))
+
+
+def entries(current_version):
+    """
+    Return [(name, article count)] ordered by name for the given version.
+    """
+    key = _entries_key(current_version)
+    cloud = cache.get(key)
+    if cloud is None:
+        cloud = build()
+        cache.set(key, cloud, TAGS_CACHE_TIMEOUT)
+    return cloud
+
+
+def etag(current_version, popular, limit):
+    return quote_etag(f'tags-{current_version}-{int(popular)}-{limit}')
+
+
+def payload(cloud, popular, limit):
+    """
+    Render the cached cloud as the /api/tags response. `popular` orders tags by
+    article count and adds tagCounts; `limit` keeps only the first N tags.
+    """
+    if popular:
+        cloud = sorted(cloud, key=lambda entry: (-entry[1], entry[0]))
+    if limit is not None:
+        cloud = cloud[:limit]
+
+    data = {'tags': [name for name, _ in cloud]}
+    if popular:
+        data['tagCounts'] = {name: articles_count for name, articles_count in cloud}
+    return data
@@ -0,0 +1,153 @@
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache_versions import CacheVersion
+from .counts import primary
+from .models import Article
+
+# Seconds a process serves its copy of the index before rebuilding it, which
+# bounds staleness when the cache holding the version is not shared.
+TAG_INDEX_MAX_AGE = getattr(settings, 'TAG_INDEX_MAX_AGE', 300)
+
+shared_version = CacheVersion('tag_index:version')
+
+
+def intersect(postings):
+    """
+    Intersect sorted id arrays, walking the shortest one and binary-searching
+    the others from the last matched position.
+    """
+    postings = sorted(postings, key=len)
+    if not postings:
+        return []
+
+    result = []
+    positions = [0] * len(postings)
+    for article_id in postings[0]:
+        for i, other in enumerate(postings[1:], start=1):
+            positions[i] = bisect_left(other, article_id, positions[i])
+            if positions[i] == len(other) or other[positions[i]] != article_id:
+                break
+        else:
+            result.append(article_id)
+    return result
+
+
+def union(postings):
+    result = []
+    for article_id in heapq.merge(*postings):
+        if not result or result[-1] != article_id:
+            result.append(article_id)
+    return result
+
+
+class TagPostingIndex:
+    """
+    Maps each tag name to a sorted array of the ids of articles carrying it.
+
+    The index is updated from Article.tags m2m_changed signals in the process
+    that made the change, once its transaction commits. Every change also
+    bumps a version in the shared cache; a process that finds a version it did not produce itself rebuilds
+    its copy before answering. Copies older than TAG_INDEX_MAX_AGE are rebuilt
+    too, in case the cache is per process.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._version = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+
+    def _shared_version(self):
+        return shared_version.get()
+
+    def _bump(self):
+        version = shared_version.bump()
+        if version is None or self._version is None or version != self._version + 1:
+            self._version = None
+        else:
+            self._version = version
+
+    def _rebuild(self, version):
+        postings = {}
+        rows = primary(Article.tags.through.objects).order_by('tag__name', 'article_id').values_list('tag__name', 'article_id')
+        for name, article_id in rows.iterator(chunk_size=10000):
+            postings.setdefault(name, array('q')).append(article_id)
+        self._postings = postings
+        self._version = version
+        self._built_at = time.monotonic()
+
+    def _ensure_current(self):
+        version = self._shared_version()
+        if version != self._version or time.monotonic() - self._built_at > TAG_INDEX_MAX_AGE:
+            self._rebuild(version)
+
+    def add(self, tag_names, article_ids):
+        tag_names, article_ids = list(tag_names), list(article_ids)
+        transaction.on_commit(lambda: self._add(tag_names, article_ids))
+
+    def remove(self, tag_names, article_ids):
+        tag_names, article_ids = list(tag_names), list(article_ids)
+        transaction.on_commit(lambda: self._remove(tag_names, article_ids))
+
+    def discard_article(self, article_id):
+        transaction.on_commit(lambda: self._discard_article(article_id))
+
+    def invalidate(self):
+        transaction.on_commit(self._invalidate)
+
+    def _add(self, tag_names, article_ids):
+        with self._lock:
+            for name in tag_names:
+                posting = self._postings.setdefault(name, array('q'))
+                for article_id in article_ids:
+                    position = bisect_left(posting, article_id)
+                    if position == len(posting) or posting[position] != article_id:
+                        insort(posting, article_id)
+            self._bump()
+
+    def _remove(self, tag_names, article_ids):
+        with self._lock:
+            for name in tag_names:
+                posting = self._postings.get(name)
+                if posting is None:
+                    continue
+                for article_id in article_ids:
+                    position = bisect_left(posting, article_id)
+                    if position < len(posting) and posting[position] == article_id:
+                        del posting[position]
+            self._bump()
+
+    def _discard_article(self, article_id):
+        with self._lock:
+            for posting in self._postings.values():
+                position = bisect_left(posting, article_id)
+                if position < len(posting) and posting[position] == article_id:
+                    del posting[position]
+            self._bump()
+
+    def _invalidate(self):
+        with self._lock:
+            self._version = None
+            shared_version.bump()
+
+    def match(self, tag_names, match_all=True):
+        """
+        Return ids of articles carrying all (or any) of the tags, newest first.
+        Article ids follow creation order, so id order matches created_at.
+        """
+        with self._lock:
+            self._ensure_current()
+            postings = [self._postings.get(name, array('q')) for name in tag_names]
+            ids = intersect(postings) if match_all else union(postings)
+        ids.reverse()
+        return ids
+
+
+index = TagPostingIndex()
@@ -1,3 +1,655 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from contextlib import ExitStack
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import AsyncRequestFactory, Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework.renderers import JSONRenderer
+
+from . import (
+    async_views, counts, hashing, instrumentation, projection, replicas, search, tag_cloud, tag_index as tag_index_module, timeline
+)
+from .authentication import principals
+from .models import Article, Comment, Profile, Tag, TimelineEntry, User
+from .renderers import FastJSONRenderer
+from .tag_index import index as tag_index
+from .tokens import access_token_for
+
+
+def create_user(username):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='password123')
+    Profile.objects.create(user=user)
+    return user
+
+
+class APITestCase(TestCase):
+    """
+    TestCase with a client authenticated as `self.user`.
+    """
+
+    def setUp(self):
+        # Primary keys are reused between tests, so cached principals and
+        # versioned entries from an earlier test must not leak in.
+        cache.clear()
+        principals.clear()
+        self.user = create_user('reader')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {access_token_for(self.user)}'
+
+    def create_article(self, title):
+        response = self.client.post(
+            '/api/articles/', {'article': {'title': title, 'description': 'd', 'body': 'b', 'tagList': []}},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['article']['slug']
+
+    def assertReachable(self, title):
+        slug = self.create_article(title)
+        self.assertNotEqual(slug, title.lower())
+        response = self.client.get(f'/api/articles/{slug}/')
+        self.assertEqual((response.status_code, response.json()['title']), (200, title))
+
+
+class FavoriteTests(APITestCase):
+    def test_unfavorite_with_drifted_counter_does_not_go_negative(self):
+        article = Article.objects.create(title='Drift', slug='drift', description='d', body='b', author=self.user)
+        # A raw add bypasses the counter, leaving it at 0 with one favorite.
+        article.favorited_by.add(self.user)
+
+        response = self.client.delete('/api/articles/drift/favorite/')
+
+        self.assertEqual(response.status_code, 200)
+        article.refresh_from_db()
+        self.assertEqual(article.favorites_count, 0)
+
+
+class CaseInsensitiveTagTests(TransactionTestCase):
+    """
+    Tag names compared the way MySQL's default collation does; on SQLite the
+    column is switched to NOCASE for the test.
+    """
+
+    def setUp(self):
+        cache.clear()
+        principals.clear()
+        self.user = create_user('reader')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {access_token_for(self.user)}'
+        if connection.vendor == 'sqlite':
+            self.alter_collation(None, 'NOCASE')
+            self.addCleanup(self.alter_collation, 'NOCASE', None)
+
+    def alter_collation(self, old, new):
+        fields = []
+        for collation in (old, new):
+            field = Tag._meta.get_field('name').clone()
+            field.set_attributes_from_name('name')
+            field.model, field.db_collation = Tag, collation
+            fields.append(field)
+        with connection.schema_editor() as editor:
+            editor.alter_field(Tag, *fields)
+
+    def test_case_variant_links_the_row_the_database_matches(self):
+        Tag.objects.create(name='python')
+        response = self.client.post(
+            '/api/articles/',
+            {'article': {'title': 'Tagged', 'description': 'd', 'body': 'b', 'tagList': ['Python', 'django', 'PYTHON']}},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+        expected = [Tag.objects.get(name='Python').pk, Tag.objects.get(name='django').pk]
+        self.assertEqual(len(set(expected)), 2)
+        self.assertCountEqual(Article.objects.get().tags.values_list('pk', flat=True), expected)
+
+
+class ReconcileCountTests(APITestCase):
+    def test_commands_repair_drifted_counters(self):
+        article = Article.objects.create(title='Drift', slug='drift', description='d', body='b', author=self.user)
+        article.favorited_by.add(self.user)
+        Comment.objects.create(body='c', author=self.user, article=article)
+        Article.objects.filter(pk=article.pk).update(favorites_count=5, comments_count=0)
+
+        call_command('reconcile_favorites_count', '--dry-run', stdout=StringIO())
+        article.refresh_from_db()
+        self.assertEqual(article.favorites_count, 5)
+
+        for command in ('reconcile_favorites_count', 'reconcile_comments_count'):
+            out = StringIO()
+            call_command(command, stdout=out)
+            self.assertIn('Repaired 1 drifted article(s)', out.getvalue())
+        article.refresh_from_db()
+        self.assertEqual((article.favorites_count, article.comments_count), (1, 1))
+
+
+class ArticleCountTests(APITestCase):
+    def test_renaming_author_invalidates_cached_counts(self):
+        author = create_user('writer')
+        Article.objects.create(title='Mine', slug='mine', description='d', body='b', author=author)
+        self.assertEqual(self.client.get('/api/articles/?author=writer').json()['articlesCount'], 1)
+        self.assertEqual(self.client.get('/api/articles/?author=renamed').json()['articlesCount'], 0)
+
+        author.username = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            author.save()
+
+        response = self.client.get('/api/articles/?author=writer').json()
+        self.assertEqual((response['articlesCount'], response['articles']), (0, []))
+        response = self.client.get('/api/articles/?author=renamed').json()
+        self.assertEqual((response['articlesCount'], len(response['articles'])), (1, 1))
+
+    def test_saves_that_keep_the_username_leave_counts_cached(self):
+        count_version = counts.version.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/users/', {'user': {'username': 'writer', 'email': 'writer@example.com', 'password': 'password123'}},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 201)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put('/api/user', {'user': {'bio': 'New bio', 'username': 'reader'}}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(counts.version.get(), count_version)
+
+
+class InstrumentationTests(TestCase):
+    def test_only_repeated_queries_walk_the_stack(self):
+        record = instrumentation.RequestRecord()
+        with mock.patch.object(instrumentation, 'serializer_origin', return_value='ArticleSerializer.get_author') as origin:
+            for sql in ['BEGIN', 'BEGIN', 'BEGIN', 'SELECT 1', 'SELECT 2', 'SELECT 2', 'SELECT 2']:
+                record.queries.append((sql, 0.0, record.origin_of(sql)))
+
+        self.assertEqual(origin.call_count, 2)
+        self.assertEqual(record.duplicates(), {'SELECT 2': 3})
+        self.assertEqual(record.n_plus_one(), {('ArticleSerializer.get_author', 'SELECT 2'): 3})
+
+
+class ReservedSlugTests(APITestCase):
+    def test_feed_title_does_not_take_the_feed_route(self):
+        self.assertReachable('Feed')
+        self.assertEqual(self.client.get('/api/articles/feed/').status_code, 200)
+
+    def test_search_title_does_not_take_the_search_route(self):
+        self.assertReachable('Search')
+        self.assertEqual(self.client.get('/api/articles/search/').status_code, 400)
+
+    def test_export_title_does_not_take_the_export_route(self):
+        self.assertReachable('Export')
+        self.assertEqual(self.client.get('/api/articles/export/').status_code, 200)
+
+
+class RendererTests(TestCase):
+    def test_fast_renderer_matches_stock_renderer_for_api_payloads(self):
+        data = {
+            'articles': [{
+                'slug': 'caf\u00e9', 'body': 'line\u2028break </script>', 'tagList': [], 'favorited': False,
+                'favoritesCount': 2 ** 40, 'createdAt': timezone.now(), 'author': None,
+            }],
+            'articlesCount': 1,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class ConcurrentSlugTests(TransactionTestCase):
+    def test_parallel_creates_with_one_title_get_unique_slugs(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs a test database shared between threads; use settings_test.')
+        cache.clear()
+        principals.clear()
+        token = access_token_for(create_user('reader'))
+        barrier = threading.Barrier(8)
+        responses = []
+
+        def create():
+            try:
+                client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=f'Token {token}')
+                barrier.wait()
+                responses.append(client.post(
+                    '/api/articles/', {'article': {'title': 'Same title', 'description': 'd', 'body': 'b', 'tagList': []}},
+                    content_type='application/json'
+                ))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=create) for _ in range(barrier.parties)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [201] * barrier.parties)
+        slugs = {response.json()['article']['slug'] for response in responses}
+        self.assertEqual(len(slugs), barrier.parties)
+        self.assertIn('same-title', slugs)
+        self.assertEqual(Article.objects.count(), barrier.parties)
+
+
+class FeedTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = create_user('writer')
+        self.popular = create_user('popular')
+        for author in (self.author, self.popular):
+            self.assertEqual(self.client.post(f'/api/profiles/{author.username}/follow/').status_code, 200)
+
+    def post_article(self, author, title):
+        article = Article.objects.create(title=title, slug=slugify(title), description='d', body='b', author=author)
+        timeline.push(article)
+        return article
+
+    def slugs(self, response):
+        return [article['slug'] for article in response.json()['articles']]
+
+    def test_merges_high_fanout_authors_and_reads_no_follower_aggregates(self):
+        with mock.patch.object(timeline, 'FEED_FANOUT_LIMIT', 0):
+            cache.delete(timeline.HIGH_FANOUT_KEY)
+            pushed = self.post_article(self.author, 'Pushed')
+            pulled = self.post_article(self.popular, 'Pulled')
+            # Every author is high-fanout now, so neither article was pushed.
+            self.assertFalse(TimelineEntry.objects.filter(article__in=[pushed, pulled]).exists())
+
+            response = self.client.get('/api/articles/feed/').json()
+            self.assertEqual([article['slug'] for article in response['articles']], ['pulled', 'pushed'])
+            self.assertEqual(response['articlesCount'], 2)
+
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get('/api/articles/feed/')
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql'].upper()])
+
+    def test_unfollow_below_the_limit_keeps_unpushed_articles_in_feeds(self):
+        other = create_user('other')
+        other_auth = {'HTTP_AUTHORIZATION': f'Token {access_token_for(other)}'}
+        with mock.patch.object(timeline, 'FEED_FANOUT_LIMIT', 1):
+            self.assertEqual(self.client.post('/api/profiles/writer/follow/', **other_auth).status_code, 200)
+            self.post_article(self.author, 'Unpushed')
+            self.assertEqual(self.slugs(self.client.get('/api/articles/feed/')), ['unpushed'])
+
+            self.assertEqual(self.client.delete('/api/profiles/writer/follow/', **other_auth).status_code, 200)
+            self.assertEqual(self.slugs(self.client.get('/api/articles/feed/')), ['unpushed'])
+
+    def test_follow_refreshes_cached_total(self):
+        self.post_article(self.author, 'First')
+        self.assertEqual(self.client.get('/api/articles/feed/').json()['articlesCount'], 1)
+
+        self.client.delete('/api/profiles/writer/follow/')
+        self.assertEqual(self.client.get('/api/articles/feed/').json()['articlesCount'], 0)
+
+
+class ProjectionParityTests(APITestCase):
+    """
+    PROJECTION_FAST_PATH must render exactly what the serializers do.
+    """
+
+    def setUp(self):
+        super().setUp()
+        author = create_user('writer')
+        Profile.objects.filter(user=author).update(bio='Writes things', image='https://example.com/a.png')
+        self.user.profile.follows.add(author.profile)
+        python = Tag.objects.create(name='python')
+        for i, owner in enumerate((author, self.user, author)):
+            article = Article.objects.create(
+                title=f'Article {i}', slug=f'article-{i}', description='d\u00e9', body='b', author=owner
+            )
+            article.tags.set([python][:i % 2])
+            Comment.objects.create(body=f'Comment {i}', author=owner, article=article)
+        Article.objects.get(slug='article-0').favorited_by.add(self.user)
+
+    def test_fast_path_renders_like_the_serializers(self):
+        paths = ['/api/articles/', '/api/articles/?tag=python', '/api/articles/article-0/comments/']
+        for path in paths:
+            with self.subTest(path=path):
+                expected = self.client.get(path)
+                with mock.patch.object(projection, 'PROJECTION_FAST_PATH', True):
+                    actual = self.client.get(path)
+                self.assertEqual(expected.status_code, 200)
+                self.assertEqual(actual.content, expected.content)
+
+
+class ArticleListParityTests(TransactionTestCase):
+    """
+    The async article views must answer like ArticleViewSet, without blocking
+    the event loop on the cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        principals.clear()
+        tag_index.invalidate()
+        self.user = create_user('reader')
+        self.token = access_token_for(self.user)
+        author = create_user('writer')
+        python, django = Tag.objects.create(name='python'), Tag.objects.create(name='django')
+        for i in range(6):
+            article = Article.objects.create(
+                title=f'Article {i}', slug=f'article-{i}', description='d', body='b',
+                author=author if i % 2 else self.user
+            )
+            article.tags.set([python, django][:i % 3])
+        Article.objects.get(slug='article-4').favorited_by.add(self.user)
+
+    def test_async_list_matches_sync_list(self):
+        paths = [
+            '/api/articles/', '/api/articles/?limit=2&offset=1', '/api/articles/?author=writer',
+            '/api/articles/?tag=python', '/api/articles/?favorited=reader', '/api/articles/?cursor=&limit=2',
+            '/api/articles/?tags=python,django', '/api/articles/?tags=python,django&tagsMatch=any&limit=2',
+            '/api/articles/?tags=python&author=writer', '/api/articles/?tags=django&cursor=&limit=1',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                # Cold caches first, so the async view also stores fragments and the principal.
+                cache.clear()
+                principals.clear()
+                cold = self.async_get(async_views.article_list, path)
+                expected = self.client.get(path, HTTP_AUTHORIZATION=f'Token {self.token}').json()
+                self.assertEqual(cold, expected)
+                self.assertEqual(self.async_get(async_views.article_list, path), expected)
+
+    def test_async_detail_matches_sync_detail(self):
+        path = '/api/articles/article-4/'
+        cold = self.async_get(async_views.article_detail, path, slug='article-4')
+        self.assertEqual(cold, self.client.get(path, HTTP_AUTHORIZATION=f'Token {self.token}').json())
+
+    def async_get(self, view, path, **kwargs):
+        """
+        Call the async view with every blocking cache call from the event
+        loop turned into a failure, and return the decoded response.
+        """
+        def off_the_loop(method):
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return method(*args, **kwargs)
+                raise AssertionError(f'cache.{method.__name__}() called on the event loop')
+            return call
+
+        request = AsyncRequestFactory().get(path, headers={'Authorization': f'Token {self.token}'})
+        with ExitStack() as stack:
+            for name in ('get', 'set', 'add', 'get_many', 'set_many', 'delete', 'incr'):
+                stack.enter_context(mock.patch.object(cache, name, off_the_loop(getattr(cache, name))))
+            response = async_to_sync(view)(request, **kwargs)
+        return json.loads(response.content)
+
+
+class AsyncAuthTests(TransactionTestCase):
+    """
+    The async login and registration views must answer like UserViewSet and
+    shed load once the hashing pool is full.
+    """
+
+    def setUp(self):
+        cache.clear()
+        principals.clear()
+        self.user = create_user('reader')
+
+    def async_post(self, view, payload):
+        request = AsyncRequestFactory().post('/', payload, content_type='application/json')
+        return async_to_sync(view)(request)
+
+    def test_errors_match_the_sync_views(self):
+        cases = [
+            (async_views.login, '/api/users/login', {'user': {'email': 'reader@example.com', 'password': 'wrong'}}),
+            (async_views.login, '/api/users/login', {'user': {'email': 'nobody@example.com', 'password': 'password123'}}),
+            (async_views.login, '/api/users/login', {'user': {'email': 'reader@example.com'}}),
+            (async_views.register, '/api/users/', {'user': {'username': 'reader', 'email': 'reader@example.com', 'password': 'password123'}}),
+            (async_views.register, '/api/users/', {'user': {'username': 'writer'}}),
+        ]
+        for view, path, payload in cases:
+            with self.subTest(path=path, payload=payload):
+                response = self.async_post(view, payload)
+                expected = self.client.post(path, payload, content_type='application/json')
+                self.assertEqual(
+                    (response.status_code, json.loads(response.content)), (expected.status_code, expected.json())
+                )
+
+    def test_login_and_register_succeed(self):
+        response = self.async_post(async_views.login, {'user': {'email': 'reader@example.com', 'password': 'password123'}})
+        self.assertEqual((response.status_code, json.loads(response.content)['user']['username']), (200, 'reader'))
+
+        response = self.async_post(
+            async_views.register, {'user': {'username': 'writer', 'email': 'writer@example.com', 'password': 'password123'}}
+        )
+        self.assertEqual(response.status_code, 201)
+        writer = User.objects.get(username='writer')
+        self.assertTrue(writer.check_password('password123'))
+        self.assertTrue(Profile.objects.filter(user=writer).exists())
+
+    def test_saturated_pool_answers_429(self):
+        payloads = [
+            (async_views.login, {'user': {'email': 'reader@example.com', 'password': 'password123'}}),
+            (async_views.login, {'user': {'email': 'nobody@example.com', 'password': 'password123'}}),
+            (async_views.register, {'user': {'username': 'writer', 'email': 'writer@example.com', 'password': 'password123'}}),
+        ]
+        with mock.patch.object(hashing, 'pool', hashing.HashingPool(1, 0)):
+            for view, payload in payloads:
+                with self.subTest(payload=payload):
+                    response = self.async_post(view, payload)
+                    self.assertEqual((response.status_code, response['Retry-After']), (429, '1'))
+        self.assertFalse(User.objects.filter(username='writer').exists())
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.MD5PasswordHasher', 'django.contrib.auth.hashers.ScryptPasswordHasher'
+    ])
+    def test_login_rehashes_an_outdated_password(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('password123', hasher='scrypt'))
+
+        response = self.async_post(async_views.login, {'user': {'email': 'reader@example.com', 'password': 'password123'}})
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('md5$'))
+        self.assertTrue(self.user.check_password('password123'))
+
+
+class FragmentInvalidationTests(APITestCase):
+    """
+    Cached article fragments embed the author's profile and the tag names, so
+    editing either must show up in the next listing.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.writer = create_user('writer')
+        self.tag = Tag.objects.create(name='python')
+        article = Article.objects.create(title='Cached', slug='cached', description='d', body='b', author=self.writer)
+        article.tags.set([self.tag])
+        # Warm the fragment cache.
+        listed = self.listed()
+        self.assertEqual((listed['author']['bio'], listed['tagList']), (None, ['python']))
+
+    def listed(self):
+        return self.client.get('/api/articles/').json()['articles'][0]
+
+    def test_profile_edit_shows_up_in_cached_lists(self):
+        profile = self.writer.profile
+        profile.bio = 'Writes about Python'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        self.assertEqual(self.listed()['author']['bio'], 'Writes about Python')
+
+    def test_tag_rename_shows_up_in_cached_lists(self):
+        self.tag.name = 'python3'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.save()
+
+        self.assertEqual(self.listed()['tagList'], ['python3'])
+
+    def test_tag_delete_shows_up_in_cached_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+
+        self.assertEqual(self.listed()['tagList'], [])
+
+
+class TagIndexTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        tag_index.invalidate()
+        self.python = Tag.objects.create(name='python')
+        for i in range(30):
+            Article.objects.create(
+                title=f'Tagged {i}', slug=f'tagged-{i}', description='d', body='b', author=self.user
+            ).tags.add(self.python)
+
+    def test_filtered_tags_query_does_not_send_the_posting_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/articles/?tags=python&cursor=&limit=5').json()
+        self.assertEqual(len(response['articles']), 5)
+        self.assertFalse([query for query in queries if '"articles"."id" IN (' in query['sql']])
+
+    def test_stale_copy_is_rebuilt_after_max_age(self):
+        self.assertEqual(len(tag_index.match(['python'], match_all=True)), 30)
+        # Another worker tags an article; its version bump is not visible here.
+        late = Article.objects.create(title='Late', slug='late', description='d', body='b', author=self.user)
+        Article.tags.through.objects.bulk_create([Article.tags.through(article=late, tag=self.python)])
+        with mock.patch.object(tag_index, '_shared_version', return_value=tag_index._version):
+            self.assertEqual(len(tag_index.match(['python'], match_all=True)), 30)
+            with mock.patch.object(tag_index_module, 'TAG_INDEX_MAX_AGE', -1):
+                self.assertEqual(len(tag_index.match(['python'], match_all=True)), 31)
+
+
+class ArticleETagTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.slug = self.create_article('Tagged')
+        self.path = f'/api/articles/{self.slug}/'
+        self.etag = self.client.get(self.path)['ETag']
+
+    def update(self, etag, title='Retitled'):
+        return self.client.put(
+            self.path, {'article': {'description': title}}, content_type='application/json', HTTP_IF_MATCH=etag
+        )
+
+    def test_matching_if_none_match_is_answered_with_304(self):
+        for header in (self.etag, f'W/{self.etag}', f'"other", {self.etag}'):
+            with self.subTest(header=header):
+                response = self.client.get(self.path, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual((response.status_code, response['ETag']), (304, self.etag))
+        self.assertEqual(self.client.get(self.path, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_update_returns_the_new_etag(self):
+        response = self.update(self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.etag)
+        self.assertEqual(self.client.get(self.path)['ETag'], response['ETag'])
+        self.assertEqual(self.client.get(self.path, HTTP_IF_NONE_MATCH=self.etag).status_code, 200)
+
+    def test_stale_if_match_is_rejected_with_412(self):
+        self.assertEqual(self.update(self.etag, 'First').status_code, 200)
+
+        self.assertEqual(self.update(self.etag, 'Second').status_code, 412)
+        self.assertEqual(self.client.delete(self.path, HTTP_IF_MATCH=self.etag).status_code, 412)
+        self.assertEqual(self.client.get(self.path).json()['description'], 'First')
+        self.assertEqual(self.client.delete(self.path, HTTP_IF_MATCH=f'W/{self.etag}').status_code, 412)
+
+        current = self.client.get(self.path)['ETag']
+        self.assertEqual(self.client.delete(self.path, HTTP_IF_MATCH=current).status_code, 204)
+
+    def test_favoriting_changes_the_etag(self):
+        self.assertEqual(self.client.post(f'{self.path}favorite/').status_code, 200)
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.etag)
+        self.assertTrue(response.json()['favorited'])
+
+
+class TagListTests(APITestCase):
+    def test_matching_etag_is_answered_with_304(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        self.assertEqual(self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='new')
+        self.assertEqual(self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@skipUnless('replica1' in settings.DATABASES, "needs a 'replica1' test mirror, as in settings_test")
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Which connection each kind of request runs its queries on, with
+    'replica1' mirroring 'default' under test.
+    """
+
+    databases = {'default'} | ({'replica1'} & settings.DATABASES.keys())
+
+    def setUp(self):
+        cache.clear()
+        principals.clear()
+        create_user('reader')
+        Article.objects.create(title='Routed', slug='routed', description='d', body='b', author=create_user('writer'))
+        patcher = mock.patch.object(replicas, 'DATABASE_REPLICAS', ['replica1'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def used(self, method, path, **kwargs):
+        """
+        Make the request and return it with the aliases that ran its queries.
+        """
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in self.databases
+            }
+            response = getattr(self.client, method)(path, content_type='application/json', **kwargs)
+        self.assertLess(response.status_code, 400)
+        return response, {alias for alias, queries in captured.items() if queries.captured_queries}
+
+    def test_reads_use_the_replica_outside_the_write_window(self):
+        response, used = self.used(
+            'post', '/api/users/login', data={'user': {'email': 'reader@example.com', 'password': 'password123'}}
+        )
+        self.assertEqual(used, {'default'})
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Token {response.json()['user']['token']}"
+        self.assertEqual(self.used('get', '/api/articles/')[1], {'default'})
+
+        self.client.cookies.pop(replicas.STICKY_COOKIE)
+        response, used = self.used('get', '/api/articles/')
+        self.assertEqual((used, len(response.json()['articles'])), ({'replica1'}, 1))
+        # The article is read from the replica; the writes it leads to are not.
+        self.assertEqual(self.used('post', '/api/articles/routed/favorite/')[1], {'default'})
+        self.assertTrue(self.used('get', '/api/articles/routed/')[0].json()['favorited'])
+
+        self.client.cookies.pop(replicas.STICKY_COOKIE)
+        response, used = self.used('get', '/api/articles/routed/comments/')
+        self.assertEqual((used, response.json()), ({'replica1'}, {'comments': []}))
+
+
+class CommitTimingTests(APITestCase):
+    def test_cache_versions_move_only_when_the_write_commits(self):
+        tag_version, count_version = tag_cloud.version(), counts.version.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='Late', slug='late', description='d', body='b', author=self.user).tags.add(
+                Tag.objects.create(name='new')
+            )
+            # A read before the commit must not see a version to cache under.
+            self.assertEqual((tag_cloud.version(), counts.version.get()), (tag_version, count_version))
+        self.assertNotEqual(tag_cloud.version(), tag_version)
+        self.assertNotEqual(counts.version.get(), count_version)
+        self.assertEqual(len(tag_index.match(['new'])), 1)
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        Article.objects.create(title='Django caching', slug='both', description='d', body='caching in django', author=self.user)
+        Article.objects.create(title='Django only', slug='django', description='d', body='orm', author=self.user)
+        Article.objects.create(title='Caching only', slug='caching', description='d', body='redis', author=self.user)
+
+    def test_every_backend_requires_all_words(self):
+        for backend in (search.SQLiteFTS5Backend(), search.InMemoryBackend()):
+            with self.subTest(backend=type(backend).__name__):
+                backend.rebuild()
+                ids, total = backend.search('django caching', 10, 0)
+                self.assertEqual((Article.objects.get(pk=ids[0]).slug, total), ('both', 1))
+                self.assertEqual(backend.search('django missing', 10, 0), ([], 0))
@@ -0,0 +1,175 @@
+from heapq import merge
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Article, Profile, TimelineEntry
+
+# Authors with more followers than this are not fanned out on write; their
+# articles are merged into followers' feeds at read time instead.
+FEED_FANOUT_LIMIT = getattr(settings, 'FEED_FANOUT_LIMIT', 1000)
+
+# Number of recent articles copied into a timeline when a user follows an author.
+FEED_BACKFILL_LIMIT = getattr(settings, 'FEED_BACKFILL_LIMIT', 200)
+
+# Seconds the set of high-fanout authors and each user's feed total are cached.
+FEED_HIGH_FANOUT_TIMEOUT = getattr(settings, 'FEED_HIGH_FANOUT_TIMEOUT', 300)
+FEED_COUNT_TIMEOUT = getattr(settings, 'FEED_COUNT_TIMEOUT', 60)
+
+HIGH_FANOUT_KEY = 'timeline:high_fanout'
+
+
+def follower_ids(author_id):
+    return Profile.objects.filter(follows__user_id=author_id).values_list('user_id', flat=True)
+
+
+def follower_count(author_id):
+    """
+    Return the author's follower count, capped at FEED_FANOUT_LIMIT + 1.
+    """
+    return follower_ids(author_id)[:FEED_FANOUT_LIMIT + 1].count()
+
+
+def high_fanout_authors():
+    """
+    Return the ids of every author with more than FEED_FANOUT_LIMIT followers.
+    The aggregate over the follows table is cached and dropped when a follow
+    or unfollow moves an author across the limit.
+    """
+    author_ids = cache.get(HIGH_FANOUT_KEY)
+    if author_ids is None:
+        author_ids = frozenset(
+            Profile.follows.through.objects
+            .values('to_profile__user_id')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=FEED_FANOUT_LIMIT)
+            .values_list('to_profile__user_id', flat=True)
+        )
+        cache.set(HIGH_FANOUT_KEY, author_ids, FEED_HIGH_FANOUT_TIMEOUT)
+    return author_ids
+
+
+def sync_high_fanout(author_id, followers=None):
+    """
+    Return whether the author is high-fanout now, refreshing the cached set if
+    it disagrees. `followers` is the author's follower_count() when known.
+    """
+    if followers is None:
+        followers = follower_count(author_id)
+    high_fanout = followers > FEED_FANOUT_LIMIT
+    if high_fanout != (author_id in high_fanout_authors()):
+        cache.delete(HIGH_FANOUT_KEY)
+    return high_fanout
+
+
+def _count_key(user_id):
+    return f'timeline:count:{user_id}'
+
+
+def push(article):
+    """
+    Fan a new article out to the timelines of its author's followers.
+    """
+    user_ids = list(follower_ids(article.author_id)[:FEED_FANOUT_LIMIT + 1])
+    if not user_ids or len(user_ids) > FEED_FANOUT_LIMIT:
+        return
+
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, article=article, created_at=article.created_at) for user_id in user_ids],
+        ignore_conflicts=True
+    )
+
+
+def pull(article):
+    """
+    Remove an article from every timeline it was pushed to.
+    """
+    TimelineEntry.objects.filter(article=article).delete()
+
+
+def copy_recent(user_ids, author_id):
+    """
+    Copy the author's FEED_BACKFILL_LIMIT most recent articles into the
+    timelines of the users.
+    """
+    recent = list(
+        Article.objects.filter(author_id=author_id).order_by('-created_at')
+        .values_list('id', 'created_at')[:FEED_BACKFILL_LIMIT]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, article_id=article_id, created_at=created_at)
+            for user_id in user_ids
+            for article_id, created_at in recent
+        ],
+        ignore_conflicts=True
+    )
+    cache.delete_many([_count_key(user_id) for user_id in user_ids])
+
+
+def backfill(user, author):
+    """
+    Copy the author's recent articles into the user's timeline after a follow.
+    """
+    cache.delete(_count_key(user.id))
+    if not sync_high_fanout(author.id):
+        copy_recent([user.id], author.id)
+
+
+def prune(user, author):
+    """
+    Drop the author's articles from the user's timeline after an unfollow.
+
+    An unfollow that brings the author down to FEED_FANOUT_LIMIT followers
+    moves them back to fan-out on write. Articles they posted while above the
+    limit were never pushed, so they are copied to the remaining followers.
+    """
+    TimelineEntry.objects.filter(user=user, article__author=author).delete()
+    cache.delete(_count_key(user.id))
+    followers = follower_count(author.id)
+    if followers == FEED_FANOUT_LIMIT:
+        copy_recent(list(follower_ids(author.id)), author.id)
+    sync_high_fanout(author.id, followers)
+
+
+def high_fanout_followees(user):
+    """
+    Return ids of followed authors whose articles are read at request time.
+    """
+    author_ids = high_fanout_authors()
+    if not author_ids:
+        return []
+    return list(
+        Profile.follows.through.objects
+        .filter(from_profile__user_id=user.id, to_profile__user_id__in=author_ids)
+        .values_list('to_profile__user_id', flat=True)
+    )
+
+
+def feed_page(user, limit, offset):
+    """
+    Return (article ids, total) for one page of the user's feed, newest first.
+
+    Pushed entries are read with a range scan on (user, created_at); articles
+    from high-fanout authors are merged in from the (author, created_at) index.
+    The total is cached for FEED_COUNT_TIMEOUT seconds, and dropped when the
+    user follows or unfollows someone.
+    """
+    window = offset + limit
+    entries = TimelineEntry.objects.filter(user=user).order_by('-created_at', '-article_id')
+    rows = [list(entries.values_list('created_at', 'article_id')[:window])]
+
+    author_ids = high_fanout_followees(user)
+    if author_ids:
+        articles = Article.objects.filter(author_id__in=author_ids).exclude(timeline_entries__user=user)
+        rows.append(list(articles.order_by('-created_at', '-id').values_list('created_at', 'id')[:window]))
+
+    total = cache.get(_count_key(user.id))
+    if total is None:
+        total = entries.count() + (articles.count() if author_ids else 0)
+        cache.set(_count_key(user.id), total, FEED_COUNT_TIMEOUT)
+
+    ordered = merge(*rows, reverse=True)
+    return [article_id for _, article_id in islice(ordered, offset, window)], total
@@ -0,0 +1,56 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# A presented or cached access token is handed back only while it has at least
+# this much lifetime left; otherwise a new one is signed.
+TOKEN_REUSE_MIN_REMAINING = getattr(settings, 'TOKEN_REUSE_MIN_REMAINING', timedelta(minutes=30))
+
+
+def _cache_key(user):
+    return f'auth:token:{user.pk}'
+
+
+def _reusable(claims, user):
+    if claims.get('exp', 0) - time.time() < TOKEN_REUSE_MIN_REMAINING.total_seconds():
+        return False
+    if str(claims.get(api_settings.USER_ID_CLAIM)) != str(getattr(user, api_settings.USER_ID_FIELD)):
+        return False
+    if api_settings.CHECK_REVOKE_TOKEN:
+        return claims.get(api_settings.REVOKE_TOKEN_CLAIM) == get_md5_hash_password(user.password)
+    return True
+
+
+def access_token_for(user, request=None):
+    """
+    Return an access token for the user without signing one when possible.
+
+    The token the request was authenticated with is returned as is, then a
+    token cached for the same user, as long as either is well within its
+    lifetime. Only otherwise is a new AccessToken signed and cached.
+    """
+    presented = getattr(request, 'auth', None)
+    if isinstance(presented, AccessToken) and presented.token and _reusable(presented.payload, user):
+        raw = presented.token
+        return raw.decode() if isinstance(raw, bytes) else raw
+
+    cached = cache.get(_cache_key(user))
+    if cached is not None and _reusable(cached['claims'], user):
+        return cached['token']
+
+    token = AccessToken.for_user(user)
+    encoded = str(token)
+    claims = {
+        'exp': token['exp'],
+        api_settings.USER_ID_CLAIM: token[api_settings.USER_ID_CLAIM],
+        api_settings.REVOKE_TOKEN_CLAIM: token.get(api_settings.REVOKE_TOKEN_CLAIM),
+    }
+    timeout = int(token['exp'] - time.time() - TOKEN_REUSE_MIN_REMAINING.total_seconds())
+    if timeout > 0:
+        cache.set(_cache_key(user), {'token': encoded, 'claims': claims}, timeout)
+    return encoded
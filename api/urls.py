@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import UserViewSet, ArticleViewSet, TagViewSet, ProfileViewSet
 
 router = DefaultRouter()
@@ -8,12 +10,21 @@ router.register(r'articles', ArticleViewSet, basename='article')
 router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'profiles', ProfileViewSet, basename='profile')
 
-urlpatterns = [
-    path('users/', UserViewSet.as_view({'post': 'register'}), name='user-register'),
-    path('users/login', UserViewSet.as_view({'post': 'login'}), name='user-login'),
+if settings.ASGI_ASYNC_VIEWS:
+    auth_urlpatterns = [
+        path('users/', async_views.register, name='user-register'),
+        path('users/login', async_views.login, name='user-login'),
+    ]
+else:
+    auth_urlpatterns = [
+        path('users/', UserViewSet.as_view({'post': 'register'}), name='user-register'),
+        path('users/login', UserViewSet.as_view({'post': 'login'}), name='user-login'),
+    ]
+
+urlpatterns = auth_urlpatterns + [
     path('user', UserViewSet.as_view({
         'get': 'get_current_user',
         'put': 'update_user'
     }), name='user-current'),
-    path('', include(router.urls)),
+    path('', include(async_views.with_async_reads(router.urls) if settings.ASGI_ASYNC_VIEWS else router.urls)),
 ]
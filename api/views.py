@@ -1,10 +1,14 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from .models import User, Article, Tag, Profile
+from . import counts, etags, exports, listing, pagination, projection, search, tag_cloud, timeline, tokens
+from .loaders import ProfileLoader
 from .serializers import RegistrationSerializer, LoginSerializer, ArticleSerializer, CommentSerializer, CurrentUserSerializer, UpdateUserSerializer, ProfileSerializer
 
 class UserViewSet(viewsets.GenericViewSet):
@@ -51,8 +55,7 @@ class UserViewSet(viewsets.GenericViewSet):
             )
         user = request.user
         
-        refresh = RefreshToken.for_user(user)
-        access_token = str(refresh.access_token)
+        access_token = tokens.access_token_for(user, request)
         
         serializer = CurrentUserSerializer(user)
         user_data = serializer.data.copy()
@@ -74,8 +77,7 @@ class UserViewSet(viewsets.GenericViewSet):
         serializer.is_valid(raise_exception=True)
         updated_user = serializer.save()
 
-        refresh = RefreshToken.for_user(updated_user)
-        access_token = str(refresh.access_token)
+        access_token = tokens.access_token_for(updated_user, request)
         
         response_serializer = CurrentUserSerializer(updated_user)
         user_response_data = response_serializer.data.copy()
@@ -89,30 +91,55 @@ class ArticleViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     lookup_field = 'slug'
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        author = request.query_params.get('author')
-        tag = request.query_params.get('tag')
-        favorited = request.query_params.get('favorited')
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
-
-        if author:
-            queryset = queryset.filter(author__username=author)
-        if tag:
-            queryset = queryset.filter(tags__name=tag)
-        if favorited:
-            queryset = queryset.filter(favorited_by__username=favorited)
-
-        articles_count = queryset.count()
-        queryset = queryset[offset:offset+limit]
+    def get_queryset(self):
+        return Article.objects.with_listing_data(self.request.user)
 
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
+    def list(self, request, *args, **kwargs):
+        query = listing.ArticleListQuery(request.query_params)
+        limit, offset = query.limit, query.offset
+
+        if query.index_only:
+            article_ids = query.match_tags()
+            page_ids = article_ids[offset:offset+limit]
+            page = self.get_queryset().filter(pk__in=page_ids)
+            articles = {article.pk: article for article in self.load_articles(page)}
+            return Response({
+                'articles': self.render_articles([articles[pk] for pk in page_ids if pk in articles]),
+                'articlesCount': len(article_ids)
+            }, status=status.HTTP_200_OK)
+
+        queryset = query.filter(self.get_queryset())
+        articles_count = counts.articles_count(queryset, **query.count_filters)
+
+        if query.cursor is not None:
+            articles, next_cursor = pagination.keyset_page(queryset, query.cursor, limit, load=self.load_articles)
+            return Response({
+                'articles': self.render_articles(articles),
+                'articlesCount': articles_count,
+                'nextCursor': next_cursor
+            }, status=status.HTTP_200_OK)
+
+        articles = self.load_articles(queryset[offset:offset+limit])
         return Response({
-            'articles': serializer.data,
+            'articles': self.render_articles(articles),
             'articlesCount': articles_count
         }, status=status.HTTP_200_OK)
 
+    def load_articles(self, queryset):
+        if projection.PROJECTION_FAST_PATH:
+            return projection.article_rows(queryset)
+        return list(queryset)
+
+    def render_articles(self, articles):
+        """
+        Render a page of articles loaded by load_articles(); with
+        PROJECTION_FAST_PATH the rows are turned into dicts directly instead of
+        going through ArticleSerializer.
+        """
+        if projection.PROJECTION_FAST_PATH:
+            return projection.render_articles(articles)
+        return self.get_serializer(articles, many=True).data
+
     def create(self, request, *args, **kwargs):
         article_data = request.data.get('article', {})
         serializer = self.get_serializer(data=article_data)
@@ -121,6 +148,30 @@ class ArticleViewSet(viewsets.ModelViewSet):
         headers = self.get_success_headers(serializer.data)
         return Response({'article': serializer.data}, status=status.HTTP_201_CREATED, headers=headers)
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        GET /api/articles/:slug
+
+        A matching If-None-Match is answered with 304 from a lookup of the
+        article's state columns, before the article and its relations load.
+        """
+        if request.headers.get('If-None-Match'):
+            state = etags.state_queryset(request.user).filter(slug=kwargs['slug']).first()
+            if state is not None:
+                current_etag = etags.etag(state)
+                if etags.not_modified(request, current_etag):
+                    return Response(
+                        status=status.HTTP_304_NOT_MODIFIED,
+                        headers={'ETag': current_etag, 'Cache-Control': etags.CACHE_CONTROL}
+                    )
+
+        article = self.get_object()
+        serializer = self.get_serializer(article)
+        return Response(
+            serializer.data,
+            headers={'ETag': etags.etag(etags.state_of(article)), 'Cache-Control': etags.CACHE_CONTROL}
+        )
+
     def update(self, request, *args, **kwargs):
         article = self.get_object()
 
@@ -130,12 +181,23 @@ class ArticleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        article_data = request.data.get('article', {})
-        serializer = self.get_serializer(article, data=article_data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        with transaction.atomic():
+            if self.if_match_failed(article):
+                return Response(
+                    {'error': 'The article has changed since it was fetched'},
+                    status=status.HTTP_412_PRECONDITION_FAILED
+                )
+
+            article_data = request.data.get('article', {})
+            serializer = self.get_serializer(article, data=article_data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
         
-        return Response({'article': serializer.data}, status=status.HTTP_200_OK)
+        return Response(
+            {'article': serializer.data},
+            status=status.HTTP_200_OK,
+            headers={'ETag': etags.etag(etags.state_of(article))}
+        )
 
     def destroy(self, request, *args, **kwargs):
         article = self.get_object()
@@ -146,9 +208,87 @@ class ArticleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        self.perform_destroy(article)
+        with transaction.atomic():
+            if self.if_match_failed(article):
+                return Response(
+                    {'error': 'The article has changed since it was fetched'},
+                    status=status.HTTP_412_PRECONDITION_FAILED
+                )
+
+            timeline.pull(article)
+            search.backend().remove(article.pk)
+            self.perform_destroy(article)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def if_match_failed(self, article):
+        """
+        True when If-Match does not list the ETag of the article as stored now.
+        The row stays locked for the rest of the caller's transaction, so the
+        check and the write cannot interleave with another update.
+        """
+        if not self.request.headers.get('If-Match'):
+            return False
+
+        state = (
+            etags.state_queryset(self.request.user)
+            .select_for_update(of=('self',))
+            .filter(pk=article.pk)
+            .first()
+        )
+        return state is None or etags.precondition_failed(self.request, etags.etag(state))
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        GET /api/articles/export - every article as newline-delimited JSON,
+        streamed in batches so memory use does not grow with the table.
+        """
+        lines = exports.article_lines(self.get_queryset())
+        if isinstance(request._request, ASGIRequest):
+            lines = exports.aiterate(lines)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'detail': 'Search query is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = int(request.query_params.get('limit', 20))
+        offset = int(request.query_params.get('offset', 0))
+
+        article_ids, articles_count = search.backend().search(query, limit, offset)
+        articles = self.get_queryset().in_bulk(article_ids)
+
+        serializer = self.get_serializer(
+            [articles[article_id] for article_id in article_ids if article_id in articles],
+            many=True
+        )
+        return Response({
+            'articles': serializer.data,
+            'articlesCount': articles_count
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='feed')
+    def feed(self, request):
+        limit = int(request.query_params.get('limit', 20))
+        offset = int(request.query_params.get('offset', 0))
+
+        article_ids, articles_count = timeline.feed_page(request.user, limit, offset)
+        articles = self.get_queryset().in_bulk(article_ids)
+
+        serializer = self.get_serializer(
+            [articles[article_id] for article_id in article_ids if article_id in articles],
+            many=True
+        )
+        return Response({
+            'articles': serializer.data,
+            'articlesCount': articles_count
+        }, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['get', 'post'], url_path='comments')
     def comment(self, request, slug=None):
         article = self.get_object()
@@ -171,38 +311,54 @@ class ArticleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_201_CREATED
             )
         elif request.method == 'GET':
-            comments = article.comments.all().order_by('-created_at')
+            comments = article.comments.with_author_data(request.user).order_by('-created_at', '-id')
+
+            cursor = request.query_params.get('cursor')
+            limit = request.query_params.get('limit')
+            if cursor is not None or limit is not None:
+                limit = min(int(limit or 20), pagination.COMMENTS_MAX_LIMIT)
+                comments, next_cursor = pagination.keyset_page(comments, cursor, limit, load=self.load_comments)
+                return Response(
+                    {'comments': self.render_comments(comments), 'nextCursor': next_cursor},
+                    status=status.HTTP_200_OK
+                )
             
-            serializer = CommentSerializer(comments, many=True, context={'request': request})
             return Response(
-                {'comments': serializer.data}, 
+                {'comments': self.render_comments(self.load_comments(comments))}, 
                 status=status.HTTP_200_OK
             )
 
+    def load_comments(self, queryset):
+        if projection.PROJECTION_FAST_PATH:
+            return projection.comment_rows(queryset)
+        return list(queryset)
+
+    def render_comments(self, comments):
+        if projection.PROJECTION_FAST_PATH:
+            return projection.render_comments(comments)
+        return CommentSerializer(comments, many=True, context=self.get_serializer_context()).data
+
     @action(detail=True, methods=['post', 'delete'], url_path='favorite')
     def toggle_favorite(self, request, slug=None):
         article = self.get_object()
         user = request.user
 
         if request.method == 'POST':
-            if article.favorited_by.filter(id=user.id).exists():
+            if not article.add_favorite(user):
                 return Response(
                     {'message': 'Article already favorited'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            article.favorited_by.add(user)
-
         elif request.method == 'DELETE':
-            if not article.favorited_by.filter(id=user.id).exists():
+            if not article.remove_favorite(user):
                 return Response(
                     {'message': 'Article not favorited'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            article.favorited_by.remove(user)
-
-        serializer = self.get_serializer(article, context={'request': request})
+        article = self.get_queryset().get(pk=article.pk)
+        serializer = self.get_serializer(article)
         return Response({'article': serializer.data}, status=status.HTTP_200_OK)
 
     def perform_create(self, serializer):
@@ -214,6 +370,7 @@ class ArticleViewSet(viewsets.ModelViewSet):
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
+        context['profiles'] = ProfileLoader.for_request(self.request)
         return context
 
 class TagViewSet(viewsets.GenericViewSet):
@@ -223,9 +380,23 @@ class TagViewSet(viewsets.GenericViewSet):
     def list(self, request):
         """
         GET /api/tags - Get all tags
+
+        Served from a versioned cache entry. ?popular=true orders tags by
+        article count and adds tagCounts, ?limit=N keeps the first N tags, and
+        a matching If-None-Match is answered with 304 without a database query.
         """
-        tags = self.get_queryset().values_list('name', flat=True).order_by('name')
-        return Response({'tags': list(tags)}, status=status.HTTP_200_OK)
+        popular = request.query_params.get('popular') in ('1', 'true')
+        limit = request.query_params.get('limit')
+        limit = int(limit) if limit else None
+
+        current_version = tag_cloud.version()
+        etag = tag_cloud.etag(current_version, popular, limit)
+        headers = {'ETag': etag, 'Cache-Control': 'public, max-age=0, must-revalidate'}
+        if etags.not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = tag_cloud.payload(tag_cloud.entries(current_version), popular, limit)
+        return Response(data, status=status.HTTP_200_OK, headers=headers)
 
 class ProfileViewSet(viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
@@ -236,6 +407,11 @@ class ProfileViewSet(viewsets.GenericViewSet):
     def get_queryset(self):
         return Profile.objects.select_related('user').all()
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['profiles'] = ProfileLoader.for_request(self.request)
+        return context
+
     def retrieve(self, request, username=None):
         try:
             profile = Profile.objects.select_related('user').get(user__username=username)
@@ -245,7 +421,7 @@ class ProfileViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = self.get_serializer(profile, context={'request': request})
+        serializer = self.get_serializer(profile)
         return Response({'profile': serializer.data}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post', 'delete'], url_path='follow')
@@ -273,6 +449,7 @@ class ProfileViewSet(viewsets.GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             current_user_profile.follows.add(target_profile)
+            timeline.backfill(request.user, target_profile.user)
             
         elif request.method == 'DELETE':
             if not current_user_profile.follows.filter(id=target_profile.id).exists():
@@ -281,6 +458,7 @@ class ProfileViewSet(viewsets.GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             current_user_profile.follows.remove(target_profile)
+            timeline.prune(request.user, target_profile.user)
         
-        serializer = self.get_serializer(target_profile, context={'request': request})
+        serializer = self.get_serializer(target_profile)
         return Response({'profile': serializer.data}, status=status.HTTP_200_OK)
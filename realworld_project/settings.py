@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 
@@ -47,16 +47,16 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # The browsable API is only offered while debugging.
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ),
+        'api.renderers.FastJSONRenderer',
+    ) + (('rest_framework.renderers.BrowsableAPIRenderer',) if DEBUG else ()),
     'DEFAULT_PARSER_CLASSES': (
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.FormParser',
@@ -65,6 +65,8 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,6 +74,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.QueryInstrumentationMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 SIMPLE_JWT = {
@@ -105,6 +109,97 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Feed timelines: authors above FEED_FANOUT_LIMIT followers are merged into
+# feeds at read time instead of being pushed to every follower on write.
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_LIMIT = 200
+# Seconds the set of those authors, and each user's feed total, are cached.
+FEED_HIGH_FANOUT_TIMEOUT = 300
+FEED_COUNT_TIMEOUT = 60
+
+# Cached articlesCount: entries expire after ARTICLES_COUNT_TIMEOUT seconds and
+# are retired on any article, tag or favorite change. Set the threshold to use
+# table statistics for the unfiltered count on large tables.
+ARTICLES_COUNT_TIMEOUT = 300
+ARTICLES_COUNT_ESTIMATE_THRESHOLD = None
+
+# The tag cloud is cached per version; any tag or article-tag change moves to a
+# new version, so the timeout only bounds memory use.
+TAGS_CACHE_TIMEOUT = 3600
+
+# Each process keeps its own tag posting index and rebuilds it when the shared
+# version moves, or at the latest after TAG_INDEX_MAX_AGE seconds.
+TAG_INDEX_MAX_AGE = 300
+
+# Authenticated users are cached per process for AUTH_LOCAL_TTL seconds and in
+# the shared cache for AUTH_SHARED_TTL seconds; saving a user drops both.
+AUTH_LOCAL_TTL = 5
+AUTH_LOCAL_SIZE = 1024
+AUTH_SHARED_TTL = 60
+
+# Access tokens are reused instead of re-signed while this much lifetime is left.
+TOKEN_REUSE_MIN_REMAINING = timedelta(minutes=30)
+
+# Native async views, enabled by realworld_project/asgi.py. Password hashing
+# for login/register runs on a bounded pool; requests beyond
+# PASSWORD_HASHING_MAX_PENDING get 429 instead of queueing. Async read views
+# use at most ASYNC_DB_CONCURRENCY extra connections for concurrent queries.
+ASGI_ASYNC_VIEWS = config('ASGI_ASYNC_VIEWS', default=False, cast=bool)
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_MAX_PENDING = 32
+ASYNC_DB_CONCURRENCY = 4
+
+# Article search backend (dotted path). None picks MySQL FULLTEXT, SQLite FTS5
+# or the in-process api.search.InMemoryBackend from the database vendor.
+SEARCH_BACKEND = None
+
+# Attempts made to insert an article under a free slug before giving up.
+SLUG_MAX_ATTEMPTS = 5
+
+# Largest page of comments returned when ?limit= or ?cursor= is given.
+COMMENTS_MAX_LIMIT = 100
+
+# Seconds a rendered, viewer-independent article fragment is cached.
+ARTICLE_FRAGMENT_TIMEOUT = 3600
+
+# Render article and comment lists straight from .values() rows instead of
+# through the serializers; api.tests checks both agree.
+PROJECTION_FAST_PATH = config('PROJECTION_FAST_PATH', default=False, cast=bool)
+
+# Articles read per query by the streamed GET /api/articles/export.
+EXPORT_CHUNK_SIZE = 500
+
+# Slowest statements included in the per-request log line, and how many times
+# one serializer method may repeat a query before it is logged as an N+1.
+QUERY_LOG_SLOWEST = 3
+QUERY_N_PLUS_ONE_THRESHOLD = 3
+
+# Write a cProfile .prof file for requests carrying a token from
+# `manage.py profiling_token` or made by staff users; unset disables it.
+PROFILING_DIR = config('PROFILING_DIR', default=None)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=1.0, cast=float)
+PROFILING_TOKEN_MAX_AGE = 3600
+
+# Directory worker processes share so /metrics reports totals across them;
+# unset reports the answering process only. Clear it when deploying.
+METRICS_DIR = config('METRICS_DIR', default=None)
+METRICS_FLUSH_INTERVAL = 5
+
+# The per-request query log is written at INFO on the api.requests logger.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': config('API_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
+
 ROOT_URLCONF = 'realworld_project.urls'
 
 TEMPLATES = [
@@ -139,6 +234,40 @@ DATABASES = {
     }
 }
 
+# Read replicas of 'default', one per host in DATABASE_REPLICA_HOSTS, serve
+# GET/HEAD/OPTIONS requests; api.tests checks the routing against the
+# replica1 mirror in settings_test.
+DATABASE_REPLICAS = []
+for index, host in enumerate(config('DATABASE_REPLICA_HOSTS', default='', cast=Csv()), 1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Seconds a client reads from the primary after a successful write.
+READ_YOUR_WRITES_WINDOW = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+
+# Cache versions, counts and the tag cloud must be shared by every worker, so
+# deployments set CACHE_REDIS_URL; without it each process has its own cache.
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default=None)
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,22 @@
+"""
+Settings for the endpoint benchmarks:
+
+    python manage.py bench_endpoints --settings=realworld_project.settings_bench
+
+The runner builds a throwaway in-memory SQLite database from these settings,
+so nothing is written to disk, and passwords use a cheap hasher so login and
+register measure the views rather than PBKDF2.
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Keep the report readable; N+1 warnings are still shown.
+LOGGING['loggers']['api']['level'] = 'WARNING'  # noqa: F405
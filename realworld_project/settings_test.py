@@ -0,0 +1,31 @@
+"""
+Settings for the test suite:
+
+    python manage.py test api --settings=realworld_project.settings_test
+
+The test database is a SQLite file in the temporary directory rather than
+an in-memory one, so tests that need several connections at once, such as
+concurrent requests and replica routing, run too. 'replica1' mirrors it
+under test; the tests that need replica routing switch it on themselves.
+"""
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+
+TEST_DATABASE_DIR = Path(tempfile.gettempdir())
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': TEST_DATABASE_DIR / 'realworld.sqlite3',
+        'TEST': {'NAME': TEST_DATABASE_DIR / 'test_realworld.sqlite3'},
+    },
+    'replica1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': TEST_DATABASE_DIR / 'realworld.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']